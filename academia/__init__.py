@@ -0,0 +1,106 @@
+import os
+import weakref
+
+from flask import Flask, before_render_template, template_rendered
+
+from .config import basedir, configuracao_padrao, opcoes_engine
+from .extensoes import aplicar_pragmas_sqlite, db, login_manager
+from .caches import CacheLRU, CacheTTL
+from .versoes import (CacheFragmentos, VersoesEntidades, criar_backend_fragmentos, fragmento,
+                      sincronizar_versoes)
+from .dashboard import EstatisticasDetalhadas
+from .metricas import (InstrumentacaoWSGI, MetricasRequisicoes, iniciar_cronometro_template, medir_template,
+                       registrar_endpoint_medido)
+from .tarefas import FilaTarefas, iniciar_fila_local
+from .fotos import ExecutorImagens, descartar_fotos_sem_commit, url_foto
+from .frequencia import BufferFrequencia, IndiceAlunos
+from .migracoes import migrar
+from .rotas.principal import bp_principal
+from .rotas.alunos import bp_alunos
+from .rotas.funcionarios import bp_funcionarios
+from .rotas.exercicios import bp_exercicios
+from .rotas.treinos import bp_treinos
+from .rotas.busca import bp_busca
+from .rotas.fotos import bp_fotos
+from .rotas.lote import bp_lote
+from .rotas.metricas import bp_metricas
+from .rotas.api import bp_api
+from .comandos import bp_comandos
+
+# --- Fábrica da aplicação ---
+# Nada é criado na importação: create_app lê a configuração, liga extensões, blueprints e o estado da
+# aplicação. Com preload (gunicorn --preload), a aplicação é criada no processo mestre e herdada pelos
+# workers no fork; os engines são descartados no filho para que cada worker abra as próprias conexões.
+
+class EstadoAplicacao:
+    """Caches, versões, métricas, fila e buffers de uma aplicação, em app.extensions['academia'].
+
+    Os módulos acessam cada um pelo nome (ver estado_da_aplicacao), sempre o da aplicação atual.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.versoes_entidades = VersoesEntidades()
+        self.cache_usuarios = CacheLRU(config['CACHE_USUARIOS_TAMANHO'], config['CACHE_USUARIOS_TTL'])
+        self.cache_dashboard = CacheTTL(config['DASHBOARD_CACHE_TTL'])
+        self.estatisticas_detalhadas = EstatisticasDetalhadas()
+        self.cache_catalogo = CacheTTL(config['CATALOGO_CACHE_TTL'])
+        self.cache_fragmentos = CacheFragmentos(criar_backend_fragmentos(app))
+        self.metricas_requisicoes = MetricasRequisicoes()
+        self.fila_tarefas = FilaTarefas()
+        self.executor_imagens = ExecutorImagens(config['FOTO_WORKERS'])
+        self.indice_alunos = IndiceAlunos(config['INDICE_ALUNOS_TTL'])
+        self.buffer_frequencia = BufferFrequencia(config['FREQUENCIA_INTERVALO'], config['FREQUENCIA_TAMANHO_LOTE'],
+                                                  config['FREQUENCIA_REPETICAO'], config['FREQUENCIA_MAX_TENTATIVAS'])
+
+# Engines de todas as aplicações criadas no processo; fracas, para não prender aplicações descartadas
+_engines_aplicacoes = weakref.WeakSet()
+
+def _reiniciar_apos_fork():
+    for engine in list(_engines_aplicacoes):
+        engine.dispose(close=False)
+
+# Registrado uma vez, na importação: create_app roda várias vezes em testes e no 'benchmark-workers'
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_apos_fork)
+
+def create_app(config=None):
+    """Cria a aplicação. 'config' (dict ou objeto) sobrepõe os padrões e as variáveis ACADEMIA_*."""
+    app = Flask(__name__, root_path=basedir)
+    app.config.update(configuracao_padrao())
+    # Qualquer chave pode vir do ambiente com prefixo, ex.: ACADEMIA_ITENS_POR_PAGINA=100
+    app.config.from_prefixed_env('ACADEMIA')
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opcoes_engine(app.config['SQLALCHEMY_DATABASE_URI']))
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    app.extensions['academia'] = EstadoAplicacao(app)
+    for blueprint in (bp_principal, bp_alunos, bp_funcionarios, bp_exercicios, bp_treinos, bp_busca, bp_fotos,
+                      bp_lote, bp_metricas, bp_api, bp_comandos):
+        app.register_blueprint(blueprint)
+
+    # Ganchos de todas as requisições, fora dos blueprints; sincronizar_versoes vem antes de qualquer leitura
+    app.before_request(sincronizar_versoes)
+    app.before_request(registrar_endpoint_medido)
+    app.before_request(iniciar_fila_local)
+    app.teardown_request(descartar_fotos_sem_commit)
+    app.add_template_global(fragmento)
+    app.add_template_global(url_foto)
+    before_render_template.connect(iniciar_cronometro_template, app)
+    template_rendered.connect(medir_template, app)
+    app.wsgi_app = InstrumentacaoWSGI(app)
+
+    with app.app_context():
+        _engines_aplicacoes.update(db.engines.values())
+        if db.engine.dialect.name == 'sqlite':
+            aplicar_pragmas_sqlite(db.engine, app.config['SQLITE_PRAGMAS'])
+        if app.config['MIGRAR_AO_INICIAR']:
+            migrar()
+            db.session.remove()
+            db.engine.dispose()
+    return app
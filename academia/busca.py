@@ -0,0 +1,124 @@
+import re
+
+from sqlalchemy import column, event, or_, text
+from sqlalchemy.orm import Session, selectinload
+
+from .extensoes import db
+from .modelos import Aluno, Exercicio, Funcionario, GrupoMuscular
+
+# --- Busca textual indexada (SQLite FTS5) ---
+# Cada tabela FTS usa o id do registro como rowid e é mantida pelos eventos do ORM.
+
+def somente_digitos(valor):
+    return re.sub(r'\D', '', valor or '')
+
+# modelo -> (tabela FTS, colunas, valores indexados, filtro LIKE usado fora do SQLite)
+INDICES_BUSCA = {
+    Aluno: ('busca_alunos', ('nome', 'cpf'),
+            lambda a: (a.nome, somente_digitos(a.cpf)),
+            lambda q: or_(Aluno.nome.contains(q), Aluno.cpf.contains(q))),
+    Funcionario: ('busca_funcionarios', ('nome', 'cargo'),
+                  lambda f: (f.nome, f.cargo or ''),
+                  lambda q: or_(Funcionario.nome.contains(q), Funcionario.cargo.contains(q))),
+    Exercicio: ('busca_exercicios', ('nome', 'grupo_muscular'),
+                lambda e: (e.nome, ' '.join(g.nome for g in e.grupos)),
+                lambda q: or_(Exercicio.nome.contains(q), Exercicio.grupos.any(GrupoMuscular.nome.contains(q)))),
+}
+# Relacionamentos lidos pelos valores indexados e pelos resultados da busca
+CARGAS_BUSCA = {Exercicio: (selectinload(Exercicio.grupos),)}
+
+def busca_indexada_disponivel(conexao=None):
+    dialeto = conexao.dialect if conexao is not None else db.engine.dialect
+    return dialeto.name == 'sqlite'
+
+def expressao_busca(search):
+    # Junta CPF formatado (123.456.789-00) e transforma cada termo em busca por prefixo
+    termo = re.sub(r'(?<=\d)[.\-/](?=\d)', '', search or '')
+    tokens = re.findall(r'\w+', termo)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def _indexar(conexao, modelo, registro):
+    tabela, colunas, extrair, _ = INDICES_BUSCA[modelo]
+    valores = dict(zip(colunas, extrair(registro)), rowid=registro.id)
+    conexao.execute(text(
+        f"INSERT INTO {tabela} (rowid, {', '.join(colunas)}) "
+        f"VALUES (:rowid, {', '.join(':' + c for c in colunas)})"
+    ), valores)
+
+def _remover_do_indice(conexao, modelo, registro_id):
+    tabela = INDICES_BUSCA[modelo][0]
+    conexao.execute(text(f"DELETE FROM {tabela} WHERE rowid = :rowid"), {'rowid': registro_id})
+
+def _registrar_eventos_busca(modelo):
+    @event.listens_for(modelo, 'after_insert')
+    def apos_inserir(mapper, conexao, registro):
+        if busca_indexada_disponivel(conexao):
+            _indexar(conexao, modelo, registro)
+
+    @event.listens_for(modelo, 'after_update')
+    def apos_atualizar(mapper, conexao, registro):
+        if busca_indexada_disponivel(conexao):
+            _remover_do_indice(conexao, modelo, registro.id)
+            _indexar(conexao, modelo, registro)
+
+    @event.listens_for(modelo, 'after_delete')
+    def apos_excluir(mapper, conexao, registro):
+        if busca_indexada_disponivel(conexao):
+            _remover_do_indice(conexao, modelo, registro.id)
+
+for _modelo in INDICES_BUSCA:
+    _registrar_eventos_busca(_modelo)
+
+def reindexar_busca(modelo, conexao):
+    tabela = INDICES_BUSCA[modelo][0]
+    conexao.execute(text(f"DELETE FROM {tabela}"))
+    with Session(bind=conexao) as sessao:
+        for registro in sessao.query(modelo).options(*CARGAS_BUSCA.get(modelo, ())).yield_per(1000):
+            _indexar(conexao, modelo, registro)
+
+def criar_indices_busca(conexao):
+    """Cria as tabelas FTS que faltam (chamado pelo migrar()), indexando os dados já existentes."""
+    if not busca_indexada_disponivel(conexao):
+        return
+    for modelo, (tabela, colunas, _, _) in INDICES_BUSCA.items():
+        existe = conexao.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"
+        ), {'nome': tabela}).first()
+        if existe:
+            continue
+        conexao.execute(text(
+            f"CREATE VIRTUAL TABLE {tabela} USING fts5({', '.join(colunas)}, "
+            f"tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        reindexar_busca(modelo, conexao)
+
+def filtro_busca(modelo, search):
+    """Filtro por id usando o índice FTS; cai para LIKE quando o banco não é SQLite."""
+    expressao = expressao_busca(search)
+    if not expressao or not busca_indexada_disponivel():
+        return INDICES_BUSCA[modelo][3](search)
+    tabela = INDICES_BUSCA[modelo][0]
+    ids = text(f"SELECT rowid FROM {tabela} WHERE {tabela} MATCH :expressao") \
+        .bindparams(expressao=expressao).columns(column('rowid'))
+    return modelo.id.in_(ids)
+
+def buscar_ranqueado(modelo, search, limite):
+    """Retorna os registros mais relevantes (bm25) para o termo buscado."""
+    expressao = expressao_busca(search)
+    if not expressao or not busca_indexada_disponivel():
+        filtro_like = INDICES_BUSCA[modelo][3](search)
+        return modelo.query.options(*CARGAS_BUSCA.get(modelo, ())).filter(filtro_like) \
+            .order_by(modelo.nome).limit(limite).all()
+    tabela = INDICES_BUSCA[modelo][0]
+    ids = [linha[0] for linha in db.session.execute(text(
+        f"SELECT rowid FROM {tabela} WHERE {tabela} MATCH :expressao ORDER BY rank LIMIT :limite"
+    ), {'expressao': expressao, 'limite': limite})]
+    registros = {r.id: r for r in modelo.query.options(*CARGAS_BUSCA.get(modelo, ())).filter(modelo.id.in_(ids))}
+    return [registros[i] for i in ids if i in registros]
+
+def indexar_ids(conexao, modelo, ids):
+    if not ids or not busca_indexada_disponivel(conexao):
+        return
+    with Session(bind=conexao) as sessao:
+        for registro in sessao.query(modelo).options(*CARGAS_BUSCA.get(modelo, ())).filter(modelo.id.in_(ids)):
+            _indexar(conexao, modelo, registro)
@@ -0,0 +1,63 @@
+import time
+import threading
+from collections import OrderedDict
+
+class CacheLRU:
+    """Cache LRU limitado, com validade por item, seguro para uso entre threads."""
+
+    def __init__(self, tamanho, ttl):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return item[1]
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+class CacheTTL:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave, calcular, versao=None):
+        """'versao' (assinatura das entidades usadas no cálculo) descarta o item quando muda em qualquer processo."""
+        agora = time.monotonic()
+        with self._lock:
+            item = self._valores.get(chave)
+            if item and item[0] > agora and item[1] == versao:
+                return item[2]
+        valor = calcular()
+        with self._lock:
+            self._valores[chave] = (agora + self.ttl, versao, valor)
+        return valor
+
+    def invalidar(self, chave=None):
+        with self._lock:
+            if chave is None:
+                self._valores.clear()
+            else:
+                self._valores.pop(chave, None)
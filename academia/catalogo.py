@@ -0,0 +1,28 @@
+import json
+import hashlib
+
+from sqlalchemy.orm import selectinload
+
+from .extensoes import estado_da_aplicacao
+from .modelos import Exercicio
+from .versoes import versoes_entidades
+
+# --- Catálogo de exercícios (JSON versionado usado pelo seletor das fichas) ---
+
+cache_catalogo = estado_da_aplicacao('cache_catalogo')
+
+def gerar_catalogo():
+    exercicios = Exercicio.query.options(selectinload(Exercicio.grupos)).order_by(Exercicio.nome, Exercicio.id).all()
+    corpo = json.dumps(
+        [[e.id, e.nome, [g.nome for g in e.grupos]] for e in exercicios],
+        ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+    return corpo, hashlib.sha1(corpo).hexdigest()[:16]
+
+def catalogo_exercicios():
+    """Retorna (json, versão); a versão é o hash do conteúdo, igual em todos os workers.
+
+    O JSON em cache vale enquanto ('Exercicio', None) não mudar em versoes_entidades: alterações
+    de exercícios (e dos seus grupos) em qualquer worker são vistas na requisição seguinte.
+    """
+    return cache_catalogo.obter('catalogo', gerar_catalogo, versoes_entidades.assinatura(('Exercicio', None)))
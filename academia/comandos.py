@@ -0,0 +1,652 @@
+import os
+import functools
+import json
+import time
+import threading
+import click
+import tempfile
+import random
+import shutil
+import sqlite3
+import signal
+import subprocess
+import sys
+import tracemalloc
+from datetime import date, datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+
+from werkzeug.utils import secure_filename
+from werkzeug.security import check_password_hash, generate_password_hash
+from flask import Blueprint, current_app
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+try:
+    import resource
+except ImportError:  # Windows: o benchmark não informa o pico de memória do processo
+    resource = None
+
+from .config import basedir, opcoes_engine
+from .extensoes import aplicar_pragmas_sqlite, db
+from .modelos import Aluno, Exercicio, Funcionario, GrupoMuscular, ItemTreino, Tarefa, Treino, exercicio_grupo
+from .busca import INDICES_BUSCA, busca_indexada_disponivel, indexar_ids, reindexar_busca
+from .versoes import cache_fragmentos, versoes_entidades
+from .dashboard import cache_dashboard, estatisticas_detalhadas
+from .catalogo import cache_catalogo
+from .usuarios import cache_usuarios, load_user
+from .tarefas import fila_tarefas
+from .fotos import FOTO_PADRAO, caminho_foto, executor_imagens, gerar_variantes, marcar_fotos_alteradas, nome_variante
+from .lote import CAMPOS_LOTE, ImportacaoLote, formato_do_arquivo, ler_registros, serializar_exportacao
+from .fichas import chave_ficha, dados_fichas, diretorio_fichas, gravar_pdf_ficha
+from .migracoes import migrar
+
+# Comandos 'flask ...' sem prefixo de grupo
+bp_comandos = Blueprint('comandos', __name__, cli_group=None)
+
+# --- Busca textual ---
+
+@bp_comandos.cli.command('reindexar-busca')
+def reindexar_busca_comando():
+    """Recria o conteúdo dos índices de busca a partir das tabelas."""
+    migrar()
+    with db.engine.begin() as conexao:
+        for modelo in INDICES_BUSCA:
+            reindexar_busca(modelo, conexao)
+    click.echo('Índices de busca atualizados.')
+
+
+# --- Benchmarks de sessão e de concorrência no SQLite ---
+
+@bp_comandos.cli.command('benchmark-sessao')
+@click.argument('user_id')
+@click.option('--repeticoes', default=2000, help='Número de requisições simuladas.')
+def benchmark_sessao(user_id, repeticoes):
+    """Mede o custo do user_loader por requisição, sem e com o cache de identidade."""
+    def medir(limpar_cache):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            if limpar_cache:
+                cache_usuarios.limpar()
+            with current_app.test_request_context():
+                load_user(user_id)
+                db.session.remove()
+        return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+    sem_cache = medir(limpar_cache=True)
+    com_cache = medir(limpar_cache=False)
+    click.echo(f'load_user sem cache: {sem_cache:.1f} us/requisição')
+    click.echo(f'load_user com cache: {com_cache:.1f} us/requisição')
+
+    with current_app.test_request_context():
+        senha_hash = generate_password_hash('benchmark', method=current_app.config['SENHA_METODO_HASH'])
+        inicio = time.perf_counter()
+        check_password_hash(senha_hash, 'benchmark')
+        click.echo(f"login ({current_app.config['SENHA_METODO_HASH']}): {(time.perf_counter() - inicio) * 1e3:.1f} ms por verificação")
+
+
+@bp_comandos.cli.command('benchmark-concorrencia')
+@click.option('--leitores', default=8, help='Threads lendo alunos e fichas.')
+@click.option('--escritores', default=2, help='Threads criando e removendo fichas.')
+@click.option('--duracao', default=5.0, help='Segundos de carga para cada configuração.')
+def benchmark_concorrencia(leitores, escritores, duracao):
+    """Compara a vazão do SQLite com as configurações padrão e com SQLITE_PRAGMAS."""
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('O benchmark de concorrência só se aplica ao SQLite.')
+        return
+
+    pasta = tempfile.mkdtemp(prefix='benchmark-academia-')
+    try:
+        origem = os.path.join(pasta, 'origem.db')
+        destino = sqlite3.connect(origem)
+        with db.engine.connect() as conexao:
+            conexao.connection.driver_connection.backup(destino)
+        destino.close()
+        with sqlite3.connect(origem) as conexao:
+            aluno_ids = [i for (i,) in conexao.execute('SELECT id FROM alunos')]
+        if not aluno_ids:
+            click.echo('Cadastre ao menos um aluno antes de rodar o benchmark.')
+            return
+
+        for nome, pragmas in [('padrão', {}), ('ajustado', current_app.config['SQLITE_PRAGMAS'])]:
+            arquivo = os.path.join(pasta, f'{nome}.db')
+            shutil.copy(origem, arquivo)
+            engine = create_engine(f'sqlite:///{arquivo}', **opcoes_engine(f'sqlite:///{arquivo}'))
+            aplicar_pragmas_sqlite(engine, pragmas)
+            leituras, escritas, erros = _executar_carga(engine, aluno_ids, leitores, escritores, duracao)
+            engine.dispose()
+            click.echo(f'{nome:>9}: {leituras / duracao:8.0f} leituras/s  {escritas / duracao:6.0f} escritas/s  '
+                  f'{erros} erro(s) de bloqueio')
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+def _executar_carga(engine, aluno_ids, leitores, escritores, duracao):
+    contadores = Counter()
+    lock = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def ler():
+        feitas = 0
+        while time.monotonic() < fim:
+            with engine.connect() as conexao:
+                conexao.execute(text(
+                    "SELECT a.nome, t.nome, COUNT(i.id) FROM alunos a "
+                    "LEFT JOIN treinos t ON t.aluno_id = a.id LEFT JOIN itens_treino i ON i.treino_id = t.id "
+                    "WHERE a.id = :id GROUP BY t.id"
+                ), {'id': random.choice(aluno_ids)}).all()
+            feitas += 1
+        with lock:
+            contadores['leituras'] += feitas
+
+    def escrever():
+        feitas, erros = 0, 0
+        while time.monotonic() < fim:
+            try:
+                with engine.begin() as conexao:
+                    conexao.execute(text("INSERT INTO treinos (nome, aluno_id) VALUES ('benchmark', :id)"),
+                                    {'id': random.choice(aluno_ids)})
+                    conexao.execute(text("DELETE FROM treinos WHERE nome = 'benchmark'"))
+                feitas += 1
+            except OperationalError:
+                erros += 1
+        with lock:
+            contadores['escritas'] += feitas
+            contadores['erros'] += erros
+
+    threads = [threading.Thread(target=ler) for _ in range(leitores)] + \
+        [threading.Thread(target=escrever) for _ in range(escritores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return contadores['leituras'], contadores['escritas'], contadores['erros']
+
+
+# --- Fila de tarefas ---
+
+@bp_comandos.cli.command('worker')
+@click.option('--intervalo', default=1.0, help='Segundos entre consultas quando a fila está vazia.')
+@click.option('--uma-vez', is_flag=True, help='Processa as tarefas prontas e sai.')
+def worker_comando(intervalo, uma_vez):
+    """Consome a fila de tarefas (use com TAREFAS_MODO=externo nos processos web)."""
+    if uma_vez:
+        click.echo(f'{fila_tarefas.processar_pendentes()} tarefa(s) processada(s).')
+        return
+    def encerrar(*_):
+        # Termina a tarefa em andamento antes de sair
+        fila_tarefas.parar.set()
+        fila_tarefas.avisar()
+    signal.signal(signal.SIGTERM, encerrar)
+    click.echo(f'Worker {fila_tarefas.identificador} aguardando tarefas (Ctrl+C para sair).')
+    try:
+        fila_tarefas.laco(current_app._get_current_object(), intervalo)
+    except KeyboardInterrupt:
+        pass
+
+@bp_comandos.cli.command('fila-tarefas')
+@click.option('--reprocessar', is_flag=True, help='Devolve as tarefas que falharam para a fila.')
+@click.option('--limpar', is_flag=True, help='Apaga as tarefas concluídas há mais de TAREFAS_RETENCAO_DIAS.')
+def fila_tarefas_comando(reprocessar, limpar):
+    """Mostra a profundidade da fila e as últimas falhas."""
+    tarefas = Tarefa.__table__
+    if reprocessar:
+        total = db.session.execute(tarefas.update().where(tarefas.c.estado == 'falhou').values(
+            estado='pendente', tentativas=0, executar_apos=datetime.now())).rowcount
+        db.session.commit()
+        click.echo(f'{total} tarefa(s) devolvida(s) para a fila.')
+    if limpar:
+        click.echo(f"{fila_tarefas.limpar(current_app.config['TAREFAS_RETENCAO_DIAS'])} tarefa(s) concluída(s) apagada(s).")
+    for estado, tipo, total in sorted(fila_tarefas.profundidade()):
+        click.echo(f'{estado:>10}  {tipo:<22} {total}')
+    for registro in Tarefa.query.filter_by(estado='falhou').order_by(Tarefa.id.desc()).limit(10):
+        click.echo(f'falhou #{registro.id} {registro.tipo} {registro.argumentos}: {registro.erro}')
+
+
+# --- Fotos ---
+
+@bp_comandos.cli.command('gerar-miniaturas')
+def gerar_miniaturas_comando():
+    """Gera as variantes das fotos já existentes que ainda não têm miniatura."""
+    nomes = {n for (n,) in db.session.query(Aluno.foto).distinct()} | \
+        {n for (n,) in db.session.query(Funcionario.foto).distinct()}
+    pendentes = [n for n in nomes if n and n != FOTO_PADRAO and os.path.exists(caminho_foto(n))
+                 and not os.path.exists(caminho_foto(nome_variante(n, 'mini')))]
+    gerar = functools.partial(gerar_variantes, pasta=current_app.config['UPLOAD_FOLDER'],
+                              variantes=current_app.config['FOTO_VARIANTES'])
+    list(executor_imagens.obter().map(gerar, pendentes))
+    if pendentes:
+        marcar_fotos_alteradas(pendentes)
+    click.echo(f'{len(pendentes)} foto(s) processada(s).')
+
+
+# --- Fichas para impressão ---
+
+@bp_comandos.cli.command('gerar-fichas')
+@click.argument('funcionario')
+@click.option('--processos', default=None, type=int, help='Processos de geração (padrão: um por CPU).')
+@click.option('--saida', type=click.Path(file_okay=False), default=None,
+              help='Pasta onde copiar os PDFs, um por aluno.')
+def gerar_fichas_comando(funcionario, processos, saida):
+    """Gera o PDF da ficha de cada aluno do professor (id ou email) e guarda no cache."""
+    professor = Funcionario.query.filter(
+        Funcionario.id == int(funcionario) if funcionario.isdigit() else Funcionario.email == funcionario).first()
+    if professor is None:
+        raise click.ClickException('Funcionário não encontrado.')
+    inicio = time.perf_counter()
+    aluno_ids = db.session.scalars(select(Treino.aluno_id).where(Treino.funcionario_id == professor.id)
+                                   .distinct().order_by(Treino.aluno_id)).all()
+    fichas = dados_fichas(aluno_ids)
+    diretorio = diretorio_fichas()
+    destinos = {aluno_id: os.path.join(diretorio, f"{chave_ficha(dados, 'pdf')}.pdf") for aluno_id, dados in fichas.items()}
+    pendentes = [aluno_id for aluno_id, destino in destinos.items() if not os.path.exists(destino)]
+    leitura = time.perf_counter() - inicio
+    argumentos = ([fichas[aluno_id] for aluno_id in pendentes], [destinos[aluno_id] for aluno_id in pendentes])
+    if processos == 1 or len(pendentes) < 2:
+        list(map(gravar_pdf_ficha, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            list(pool.map(gravar_pdf_ficha, *argumentos,
+                          chunksize=max(1, len(pendentes) // ((processos or os.cpu_count() or 1) * 4))))
+    click.echo(f'{professor.nome}: {len(pendentes)} ficha(s) gerada(s) e {len(fichas) - len(pendentes)} já em cache '
+          f'em {time.perf_counter() - inicio:.2f}s (consultas: {leitura:.2f}s).')
+    if saida:
+        os.makedirs(saida, exist_ok=True)
+        for aluno_id, destino in destinos.items():
+            shutil.copyfile(destino, os.path.join(saida, f'{aluno_id}-{secure_filename(fichas[aluno_id][0])}.pdf'))
+        click.echo(f'{len(destinos)} arquivo(s) copiado(s) para {saida}.')
+
+@bp_comandos.cli.command('limpar-fichas')
+@click.option('--dias', default=30, help='Apaga as fichas em cache sem uso há mais dias que isso.')
+def limpar_fichas_comando(dias):
+    """Remove do cache as fichas que não são servidas há algum tempo (versões antigas ficam órfãs)."""
+    diretorio = diretorio_fichas()
+    limite = time.time() - dias * 86400
+    apagadas = 0
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if os.path.getmtime(caminho) < limite:
+            os.remove(caminho)
+            apagadas += 1
+    click.echo(f'{apagadas} ficha(s) removida(s) do cache.')
+
+
+# --- Importação e exportação em lote ---
+
+@bp_comandos.cli.command('importar')
+@click.argument('tipo', type=click.Choice(list(CAMPOS_LOTE)))
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--lote', default=None, type=int, help='Registros por transação.')
+@click.option('--processos', default=None, type=int, help='Processos para calcular os hashes de senha.')
+def importar_comando(tipo, arquivo, lote, processos):
+    """Importa alunos, exercícios, fichas ou itens de um arquivo CSV/JSON Lines/JSON."""
+    inicio = time.perf_counter()
+    with open(arquivo, encoding='utf-8-sig', newline='') as entrada:
+        resumo = ImportacaoLote(tipo, lote, processos, em_processos=True).executar(ler_registros(entrada, formato_do_arquivo(arquivo)))
+    for erro in resumo['erros'][:20]:
+        click.echo(erro)
+    if len(resumo['erros']) > 20:
+        click.echo(f"... e mais {len(resumo['erros']) - 20} erro(s)")
+    click.echo(f"{resumo['inseridos']} registro(s) importado(s) em {time.perf_counter() - inicio:.1f}s, "
+          f"{len(resumo['erros'])} erro(s), {resumo['lotes_rejeitados']} lote(s) recusado(s) pelo banco.")
+
+@bp_comandos.cli.command('exportar')
+@click.argument('tipo', type=click.Choice(list(CAMPOS_LOTE)))
+@click.argument('arquivo', type=click.Path(dir_okay=False, allow_dash=True))
+def exportar_comando(tipo, arquivo):
+    """Exporta alunos, exercícios, fichas ou itens; o formato vem da extensão do arquivo."""
+    if arquivo == '-':
+        for pedaco in serializar_exportacao(tipo, 'csv'):
+            click.echo(pedaco, nl=False)
+        return
+    with open(arquivo, 'w', encoding='utf-8', newline='') as saida:
+        for pedaco in serializar_exportacao(tipo, formato_do_arquivo(arquivo)):
+            saida.write(pedaco)
+
+# --- Dados sintéticos e benchmark das páginas principais ---
+# 'flask gerar-dados' preenche o banco em lotes pelo Core; 'flask benchmark' percorre as páginas com
+# o test client e grava p50/p95/p99, consultas por requisição e memória em JSON para comparar execuções.
+
+NOMES = ('Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+         'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago', 'Vitória', 'Lucas')
+SOBRENOMES = ('Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Almeida', 'Ferreira',
+              'Rodrigues', 'Gomes', 'Martins', 'Araújo', 'Ribeiro', 'Carvalho', 'Barbosa', 'Rocha', 'Mendes')
+CIDADES = (('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'), ('Curitiba', 'PR'),
+           ('Porto Alegre', 'RS'), ('Salvador', 'BA'), ('Recife', 'PE'), ('Fortaleza', 'CE'))
+MOVIMENTOS = ('Supino', 'Remada', 'Agachamento', 'Puxada', 'Desenvolvimento', 'Rosca', 'Tríceps', 'Leg Press',
+              'Elevação', 'Stiff', 'Afundo', 'Crucifixo', 'Panturrilha', 'Abdominal', 'Prancha')
+VARIACOES = ('Reto', 'Inclinado', 'Declinado', 'com Halteres', 'na Máquina', 'no Cabo', 'Unilateral', 'Livre')
+GRUPOS_SINTETICOS = ('Peito', 'Costas', 'Pernas', 'Ombros', 'Bíceps', 'Tríceps', 'Abdômen', 'Glúteos')
+
+def _nome_sintetico(rnd):
+    return f'{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}'
+
+def _data_sintetica(rnd, inicio, fim):
+    return inicio + timedelta(days=rnd.randrange((fim - inicio).days + 1))
+
+def _inserir_em_lotes(modelo, registros, tamanho_lote, retornar_ids=True):
+    tabela = modelo.__table__
+    ids, lote = [], []
+
+    def gravar():
+        with db.engine.begin() as conexao:
+            if retornar_ids:
+                novos = conexao.execute(
+                    tabela.insert().returning(tabela.c.id, sort_by_parameter_order=True), lote
+                ).scalars().all()
+                if modelo in INDICES_BUSCA:
+                    indexar_ids(conexao, modelo, novos)
+                ids.extend(novos)
+            else:
+                conexao.execute(tabela.insert(), lote)
+
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho_lote:
+            gravar()
+            lote = []
+    if lote:
+        gravar()
+    return ids
+
+@bp_comandos.cli.command('gerar-dados')
+@click.option('--alunos', default=1000, help='Alunos a criar.')
+@click.option('--funcionarios', default=20, help='Funcionários a criar.')
+@click.option('--exercicios', default=200, help='Exercícios a criar.')
+@click.option('--fichas-por-aluno', default=2, help='Fichas (Treino) por aluno.')
+@click.option('--itens-por-ficha', default=5, help='Exercícios (ItemTreino) por ficha.')
+@click.option('--senha', default='senha123', help='Senha de todos os usuários gerados.')
+@click.option('--lote', default=5000, help='Registros por transação.')
+@click.option('--semente', default=42, help='Semente do gerador aleatório (mesma semente, mesmos dados).')
+def gerar_dados(alunos, funcionarios, exercicios, fichas_por_aluno, itens_por_ficha, senha, lote, semente):
+    """Preenche o banco com dados sintéticos, ex.: --alunos 100000 --funcionarios 500 --exercicios 2000."""
+    migrar()
+    rnd = random.Random(semente)
+    inicio = time.perf_counter()
+    senha_hash = generate_password_hash(senha, method=current_app.config['SENHA_METODO_HASH'])
+    hoje = date.today()
+    base_aluno = db.session.scalar(select(func.max(Aluno.id))) or 0
+    base_funcionario = db.session.scalar(select(func.max(Funcionario.id))) or 0
+    base_exercicio = db.session.scalar(select(func.max(Exercicio.id))) or 0
+    db.session.remove()
+
+    def gerar_funcionarios():
+        for n in range(base_funcionario + 1, base_funcionario + funcionarios + 1):
+            cidade, estado = rnd.choice(CIDADES)
+            yield {'nome': _nome_sintetico(rnd), 'senha_hash': senha_hash, 'cargo': rnd.choice(('Instrutor', 'Recepção')),
+                   'cidade': cidade, 'estado': estado, 'email': f'funcionario{n}@exemplo.com',
+                   'data_admissao': _data_sintetica(rnd, hoje - timedelta(days=3650), hoje)}
+
+    def gerar_alunos():
+        for n in range(base_aluno + 1, base_aluno + alunos + 1):
+            cidade, estado = rnd.choice(CIDADES)
+            nascimento = _data_sintetica(rnd, date(1950, 1, 1), date(2008, 12, 31))
+            yield {'nome': _nome_sintetico(rnd), 'cpf': f'{90000000000 + n}', 'senha_hash': senha_hash,
+                   'data_nascimento': nascimento, 'dia_aniversario': nascimento.month * 100 + nascimento.day,
+                   'cidade': cidade, 'estado': estado, 'telefone': f'(11) 9{rnd.randrange(10**8):08d}',
+                   'email': f'aluno{n}@exemplo.com', 'status': 'Ativo' if rnd.random() < 0.9 else 'Inativo',
+                   'data_matricula': _data_sintetica(rnd, hoje - timedelta(days=1095), hoje)}
+
+    def gerar_exercicios():
+        for n in range(base_exercicio + 1, base_exercicio + exercicios + 1):
+            yield {'nome': f'{rnd.choice(MOVIMENTOS)} {rnd.choice(VARIACOES)} {n}', 'descricao': 'Gerado para testes.'}
+
+    funcionario_ids = _inserir_em_lotes(Funcionario, gerar_funcionarios(), lote)
+    aluno_ids = _inserir_em_lotes(Aluno, gerar_alunos(), lote)
+    with db.engine.begin() as conexao:
+        grupos = dict(conexao.execute(select(GrupoMuscular.nome, GrupoMuscular.id)).all())
+        novos = [nome for nome in GRUPOS_SINTETICOS if nome not in grupos]
+        if novos:
+            conexao.execute(GrupoMuscular.__table__.insert(), [{'nome': nome} for nome in novos])
+            grupos = dict(conexao.execute(select(GrupoMuscular.nome, GrupoMuscular.id)).all())
+    grupo_ids = [grupos[nome] for nome in GRUPOS_SINTETICOS]
+    exercicio_ids = _inserir_em_lotes(Exercicio, gerar_exercicios(), lote)
+    with db.engine.begin() as conexao:
+        associacoes = [{'exercicio_id': exercicio_id, 'grupo_id': grupo_id} for exercicio_id in exercicio_ids
+                       for grupo_id in rnd.sample(grupo_ids, rnd.randint(1, 2))]
+        if associacoes:
+            conexao.execute(exercicio_grupo.insert(), associacoes)
+        # Os grupos fazem parte do texto indexado dos exercícios
+        if associacoes and busca_indexada_disponivel(conexao):
+            reindexar_busca(Exercicio, conexao)
+        todos_exercicios = conexao.execute(select(Exercicio.id)).scalars().all()
+
+    fichas = ({'nome': f'Treino {"ABCDE"[k % 5]}', 'aluno_id': aluno_id,
+               'funcionario_id': rnd.choice(funcionario_ids) if funcionario_ids else None}
+              for aluno_id in aluno_ids for k in range(fichas_por_aluno))
+    treino_ids = _inserir_em_lotes(Treino, fichas, lote)
+    itens = ({'treino_id': treino_id, 'exercicio_id': rnd.choice(todos_exercicios),
+              'series': rnd.choice(('3', '4', '5')), 'repeticoes': rnd.choice(('8', '10', '12', '15')),
+              'descanso_seg': rnd.choice((30, 45, 60, 90))}
+             for treino_id in treino_ids for _ in range(itens_por_ficha if todos_exercicios else 0))
+    _inserir_em_lotes(ItemTreino, itens, lote, retornar_ids=False)
+    with db.engine.begin() as conexao:
+        versoes_entidades.invalidar_tudo(conexao)  # listagens em cache nos workers ficam desatualizadas
+    click.echo(f'{len(funcionario_ids)} funcionário(s), {len(aluno_ids)} aluno(s), {len(exercicio_ids)} exercício(s), '
+          f'{len(treino_ids)} ficha(s) e {len(treino_ids) * itens_por_ficha if todos_exercicios else 0} item(ns) '
+          f'em {time.perf_counter() - inicio:.1f}s. Senha de todos: {senha}')
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, -(-len(ordenados) * p // 100) - 1)] if ordenados else None
+
+def _cenarios_benchmark(rnd, aluno_ids):
+    termos = NOMES + SOBRENOMES
+    return [
+        ('dashboard', lambda: '/'),
+        ('lista_alunos', lambda: '/alunos'),
+        ('busca_alunos', lambda: f'/alunos?q={rnd.choice(termos)}'),
+        ('api_busca_alunos', lambda: f'/api/busca/alunos?q={rnd.choice(termos)}'),
+        ('lista_exercicios', lambda: '/exercicios'),
+        ('perfil_aluno', lambda: f'/aluno/perfil/{rnd.choice(aluno_ids)}'),
+        ('gerenciar_treinos', lambda: f'/aluno/{rnd.choice(aluno_ids)}/treinos'),
+    ]
+
+def _limpar_caches():
+    cache_fragmentos.backend.limpar()
+    cache_dashboard.invalidar()
+    cache_catalogo.invalidar()
+    cache_usuarios.limpar()
+    estatisticas_detalhadas.invalidar()
+
+@bp_comandos.cli.command('benchmark-paginas')
+@click.option('--repeticoes', default=200, help='Requisições medidas por página.')
+@click.option('--repeticoes-login', default=10, help='Logins medidos (cada um calcula um hash de senha).')
+@click.option('--amostras-memoria', default=5, help='Requisições por página medidas com tracemalloc.')
+@click.option('--email', default=None, help='Funcionário usado no login (padrão: o primeiro gerado por gerar-dados).')
+@click.option('--senha', default='senha123')
+@click.option('--frio', is_flag=True, help='Esvazia os caches da aplicação antes de cada requisição.')
+@click.option('--semente', default=42)
+@click.option('--saida', type=click.Path(dir_okay=False), default=None, help='Arquivo JSON com os resultados.')
+@click.option('--comparar', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Resultado anterior (JSON) para comparar.')
+def benchmark_paginas(repeticoes, repeticoes_login, amostras_memoria, email, senha, frio, semente, saida, comparar):
+    """Mede login, dashboard, listas/busca, perfil e fichas pelo test client e grava o resultado em JSON."""
+    rnd = random.Random(semente)
+    if email is None:
+        email = db.session.scalar(select(Funcionario.email).where(Funcionario.email.like('funcionario%@exemplo.com'))
+                                  .order_by(Funcionario.id).limit(1))
+    aluno_ids = db.session.scalars(select(Aluno.id).order_by(func.random()).limit(1000)).all()
+    volumes = {modelo.__tablename__: db.session.scalar(select(func.count()).select_from(modelo))
+               for modelo in (Aluno, Funcionario, Exercicio, Treino, ItemTreino)}
+    db.session.remove()
+    if not email or not aluno_ids:
+        raise click.ClickException('Banco sem dados: rode "flask gerar-dados" ou informe --email/--senha.')
+
+    consultas = [0]
+
+    def contar(*args):
+        consultas[0] += 1
+
+    cliente = current_app.test_client()
+    dados_login = {'email': email, 'senha': senha}
+
+    def requisitar(metodo, url, dados=None):
+        if frio:
+            _limpar_caches()
+        consultas[0] = 0
+        inicio = time.perf_counter()
+        resposta = cliente.open(url, method=metodo, data=dados, buffered=True)
+        return time.perf_counter() - inicio, consultas[0], resposta.status_code
+
+    def medir(nome, proxima_requisicao, total):
+        tempos, total_consultas, status = [], 0, Counter()
+        requisitar(*proxima_requisicao())  # aquecimento: templates compilados, caches e conexões
+        for _ in range(total):
+            segundos, feitas, codigo = requisitar(*proxima_requisicao())
+            tempos.append(segundos)
+            total_consultas += feitas
+            status[str(codigo)] += 1
+        pico = 0
+        tracemalloc.start()
+        try:
+            for _ in range(amostras_memoria):
+                tracemalloc.reset_peak()
+                requisitar(*proxima_requisicao())
+                pico = max(pico, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        resultado = {
+            'requisicoes': total,
+            'status': dict(status),
+            'p50_ms': round(percentil(tempos, 50) * 1000, 2),
+            'p95_ms': round(percentil(tempos, 95) * 1000, 2),
+            'p99_ms': round(percentil(tempos, 99) * 1000, 2),
+            'media_ms': round(sum(tempos) / total * 1000, 2),
+            'consultas_por_requisicao': round(total_consultas / total, 2),
+            'memoria_pico_kb': round(pico / 1024, 1),
+        }
+        click.echo(f"{nome:>18}: p50 {resultado['p50_ms']:8.2f} ms  p95 {resultado['p95_ms']:8.2f} ms  "
+              f"p99 {resultado['p99_ms']:8.2f} ms  {resultado['consultas_por_requisicao']:6.2f} consultas/req  "
+              f"pico {resultado['memoria_pico_kb']:8.1f} KB")
+        return resultado
+
+    event.listen(Engine, 'after_cursor_execute', contar)
+    try:
+        if requisitar('POST', '/login', dados_login)[2] != 302 or requisitar('GET', '/')[2] != 200:
+            raise click.ClickException(f'Não foi possível entrar como {email} com a senha informada.')
+
+        def proximo_login():
+            cliente.get('/logout', buffered=True)
+            return 'POST', '/login', dados_login
+
+        cenarios = {'login': medir('login', proximo_login, max(1, repeticoes_login))}
+        for nome, proxima_url in _cenarios_benchmark(rnd, aluno_ids):
+            cenarios[nome] = medir(nome, lambda proxima_url=proxima_url: ('GET', proxima_url()), repeticoes)
+    finally:
+        event.remove(Engine, 'after_cursor_execute', contar)
+
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'banco': db.engine.url.render_as_string(hide_password=True),
+        'volumes': volumes,
+        'parametros': {'repeticoes': repeticoes, 'frio': frio, 'semente': semente},
+        'rss_pico_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+        'cenarios': cenarios,
+    }
+    if saida is None:
+        pasta = os.path.join(current_app.instance_path, 'benchmarks')
+        os.makedirs(pasta, exist_ok=True)
+        saida = os.path.join(pasta, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    click.echo(f'Resultado gravado em {saida}')
+
+    if comparar:
+        with open(comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)['cenarios']
+        click.echo(f'Comparação com {comparar} (p95 e consultas por requisição):')
+        for nome, atual in cenarios.items():
+            if nome not in anterior:
+                continue
+            antes = anterior[nome]
+            variacao = (atual['p95_ms'] / antes['p95_ms'] - 1) * 100 if antes['p95_ms'] else 0.0
+            click.echo(f"{nome:>18}: p95 {antes['p95_ms']:8.2f} -> {atual['p95_ms']:8.2f} ms ({variacao:+.0f}%)  "
+                  f"consultas {antes['consultas_por_requisicao']:.2f} -> {atual['consultas_por_requisicao']:.2f}")
+
+
+# --- Migrações de esquema ---
+
+@bp_comandos.cli.command('migrar')
+def migrar_comando():
+    """Atualiza o esquema do banco para a versão atual."""
+    migrar()
+    click.echo('Banco atualizado.')
+
+
+# --- Inicialização e memória por worker ---
+
+def memoria_processo():
+    """RSS, PSS e memória privada do processo em KB (Linux); nos demais sistemas, só o pico de RSS."""
+    try:
+        with open('/proc/self/smaps_rollup') as arquivo:
+            campos = {linha.split(':')[0]: int(linha.split()[1]) for linha in arquivo if linha.endswith('kB\n')}
+        return {'rss_kb': campos['Rss'], 'pss_kb': campos['Pss'],
+                'privada_kb': campos['Private_Clean'] + campos['Private_Dirty']}
+    except OSError:
+        return {'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None}
+
+MEDIR_WORKER_NOVO = """
+import json, time
+import click
+inicio = time.perf_counter()
+from sqlalchemy import text
+from academia import create_app
+from academia.extensoes import db
+from academia.comandos import memoria_processo
+aplicacao = create_app()
+criada = time.perf_counter()
+with aplicacao.app_context():
+    db.session.execute(text('SELECT 1'))
+aplicacao.test_client().get('/login')
+pronta = time.perf_counter()
+click.echo(json.dumps({'fabrica_ms': (criada - inicio) * 1000, 'primeira_requisicao_ms': (pronta - criada) * 1000,
+                  **memoria_processo()}))
+"""
+
+def _resumir_workers(nome, medidas):
+    click.echo(f'{nome}:')
+    for campo in medidas[0]:
+        valores = [m[campo] for m in medidas if m[campo] is not None]
+        if valores:
+            click.echo(f'  {campo:>24}: média {sum(valores) / len(valores):10.1f}  máx {max(valores):10.1f}')
+
+@bp_comandos.cli.command('benchmark-workers')
+@click.option('--workers', default=4, help='Workers simulados em cada modo.')
+def benchmark_workers(workers):
+    """Mede inicialização e memória por worker: processo novo (sem preload) e fork após preload."""
+    novos = []
+    for _ in range(workers):
+        inicio = time.perf_counter()
+        saida = subprocess.run([sys.executable, '-c', MEDIR_WORKER_NOVO], cwd=basedir, check=True,
+                               capture_output=True, text=True).stdout
+        novos.append({'total_ms': (time.perf_counter() - inicio) * 1000, **json.loads(saida.splitlines()[-1])})
+    _resumir_workers('Processo novo (interpretador + importação + create_app + 1ª requisição)', novos)
+
+    if not hasattr(os, 'fork'):
+        return
+    app = current_app._get_current_object()
+    db.session.execute(text('SELECT 1'))
+    app.test_client().get('/login')  # o mestre já importou tudo e compilou os templates
+    db.session.remove()
+    bifurcados = []
+    for _ in range(workers):
+        leitura, escrita = os.pipe()
+        inicio = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(leitura)
+            with app.app_context():
+                db.session.execute(text('SELECT 1'))
+            app.test_client().get('/login')
+            medida = {'primeira_requisicao_ms': (time.perf_counter() - inicio) * 1000, **memoria_processo()}
+            os.write(escrita, json.dumps(medida).encode())
+            os._exit(0)
+        os.close(escrita)
+        with os.fdopen(leitura) as canal:
+            bifurcados.append(json.loads(canal.read()))
+        os.waitpid(pid, 0)
+    _resumir_workers('Fork após preload (do fork até a 1ª requisição)', bifurcados)
+    click.echo(f"Mestre: {memoria_processo()['rss_kb']} KB de RSS")
@@ -0,0 +1,86 @@
+import os
+
+from sqlalchemy.engine import make_url
+
+# Raiz do projeto (templates, static, banco padrão); o pacote fica um nível abaixo
+basedir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def configuracao_padrao():
+    """Configuração lida do ambiente no momento em que a aplicação é criada (ver create_app)."""
+    return {
+        'SQLALCHEMY_DATABASE_URI': os.environ.get(
+            'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + os.path.join(basedir, 'academia.db')),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        # Aplicados em cada conexão SQLite nova (WAL permite leitores simultâneos a um escritor)
+        'SQLITE_PRAGMAS': {
+            'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+            'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+            'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+            'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+            'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+            'temp_store': 'MEMORY',
+        },
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'chave-super-secreta-do-projeto'),
+        'UPLOAD_FOLDER': os.path.join(basedir, 'static', 'uploads'),
+        'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,
+        'FOTO_VARIANTES': {'mini': 128, 'media': 512},
+        'FOTO_WORKERS': 2,
+        'ITENS_POR_PAGINA': 50,
+        'MAX_ITENS_POR_PAGINA': 200,
+        'DASHBOARD_CACHE_TTL': 60,
+        'DASHBOARD_PAINEL_DETALHADO': True,
+        'CATALOGO_CACHE_TTL': 300,
+        'IMPORTACAO_TAMANHO_LOTE': 1000,
+        'IMPORTACAO_PROCESSOS': None,  # hashes de senha em paralelo; None = um por CPU
+        'IMPORTACAO_MINIMO_PARA_PROCESSOS': 64,
+        'IMPORTACAO_MAX_BYTES': 200 * 1024 * 1024,
+        'ATRIBUICAO_TAMANHO_LOTE': 500,  # alunos por INSERT ... SELECT ao atribuir um modelo
+        'CACHE_USUARIOS_TAMANHO': 1024,
+        'CACHE_USUARIOS_TTL': 300,
+        # Fragmentos de página renderizados: 'memoria' (LRU) ou 'arquivo' (um arquivo por fragmento)
+        'FRAGMENTOS_BACKEND': os.environ.get('FRAGMENTOS_BACKEND', 'memoria'),
+        'FRAGMENTOS_TAMANHO': 2048,  # itens na memória ou arquivos no diretório
+        'FRAGMENTOS_TTL': 300,
+        'FRAGMENTOS_DIRETORIO': os.environ.get('FRAGMENTOS_DIRETORIO'),  # None = <instance>/fragmentos
+        # /metrics (formato Prometheus); com token, o coletor precisa enviar 'Authorization: Bearer <token>'
+        'METRICAS_TOKEN': os.environ.get('METRICAS_TOKEN'),
+        # Requisições acima deste tempo vão para o log com as consultas SQL mais lentas (None desliga)
+        'METRICAS_LENTAS_MS': int(os.environ['METRICAS_LENTAS_MS']) if os.environ.get('METRICAS_LENTAS_MS') else None,
+        # Formato do werkzeug, ex.: 'scrypt:32768:8:1' ou 'pbkdf2:sha256:600000'
+        'SENHA_METODO_HASH': os.environ.get('SENHA_METODO_HASH', 'scrypt:32768:8:1'),
+        # Fila de tarefas: 'thread' inicia um consumidor por processo web, uma vez, na primeira requisição
+        # do worker (com N workers são N consumidores consultando a tabela); 'externo' não inicia nenhum
+        # e deixa as tarefas para 'flask worker', o recomendado com vários workers
+        'TAREFAS_MODO': os.environ.get('TAREFAS_MODO', 'thread'),
+        'TAREFAS_INTERVALO': 5,  # segundos entre consultas com a fila vazia (thread local)
+        'TAREFAS_ESPERA_BASE': 10,  # segundos antes da 2ª tentativa; dobra a cada falha
+        'TAREFAS_TIMEOUT': 300,  # tarefa 'executando' há mais tempo que isso volta para a fila
+        'TAREFAS_RETENCAO_DIAS': 7,  # tarefas concluídas são apagadas depois disso
+        # Check-in: os registros ficam em memória e são gravados em lote a cada intervalo ou ao encher o lote
+        'FREQUENCIA_INTERVALO': 1.0,  # segundos; 0 grava cada check-in na hora
+        'FREQUENCIA_TAMANHO_LOTE': 200,
+        'FREQUENCIA_REPETICAO': 300,  # segundos em que um novo check-in do mesmo aluno é ignorado
+        'FREQUENCIA_MAX_TENTATIVAS': 5,  # falhas seguidas antes de o lote ir para o arquivo de descartados
+        'INDICE_ALUNOS_TTL': 300,  # recarga do índice CPF/cartão -> aluno (alterações de outros processos)
+        'FICHAS_DIRETORIO': os.environ.get('FICHAS_DIRETORIO'),  # cache das fichas impressas; None = <instance>/fichas
+        # API JSON (/api/v1): ids por requisição em lote e compressão das respostas
+        'API_MAX_IDS': 500,
+        'API_COMPRESSAO_MINIMO': 1024,  # bytes; respostas menores vão sem compressão
+        'API_GZIP_NIVEL': 6,
+        'API_BROTLI_QUALIDADE': 5,
+        # Aplica as migrações pendentes ao criar a aplicação (com preload, uma vez só, no processo mestre)
+        'MIGRAR_AO_INICIAR': os.environ.get('MIGRAR_AO_INICIAR', '').lower() in ('1', 'true', 'sim'),
+    }
+
+def opcoes_engine(uri):
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+    opcoes = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    }
+    if url.get_backend_name() != 'sqlite':
+        opcoes.update(pool_pre_ping=True, pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 1800)))
+    return opcoes
@@ -0,0 +1,172 @@
+import time
+import threading
+from datetime import date
+from collections import Counter
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session
+
+from .extensoes import db, estado_da_aplicacao
+from .modelos import Aluno, Exercicio, Funcionario, ItemTreino, Treino
+from .versoes import VersoesEntidades, valor_anterior, versoes_entidades
+
+# --- Estatísticas do dashboard (cache em memória com invalidação) ---
+
+cache_dashboard = estado_da_aplicacao('cache_dashboard')
+
+def calcular_estatisticas():
+    total_funcionarios = select(func.count(Funcionario.id)).scalar_subquery()
+    total_exercicios = select(func.count(Exercicio.id)).scalar_subquery()
+    inicio_mes = date.today().replace(day=1)
+    matriculas_mes = select(func.count(Aluno.id)).where(Aluno.data_matricula >= inicio_mes).scalar_subquery()
+    linha = db.session.query(
+        func.count(Aluno.id),
+        func.coalesce(func.sum(case((Aluno.status == 'Ativo', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Aluno.status == 'Inativo', 1), else_=0)), 0),
+        total_funcionarios,
+        total_exercicios,
+        matriculas_mes,
+    ).one()
+    return {
+        'total_alunos': linha[0],
+        'alunos_ativos': linha[1],
+        'alunos_inativos': linha[2],
+        'total_funcionarios': linha[3],
+        'total_exercicios': linha[4],
+        'matriculas_mes': linha[5],
+    }
+
+class EstatisticasDetalhadas:
+    """Alunos por professor e exercícios mais prescritos, mantidos por deltas dos commits.
+
+    A carga completa (GROUP BY) guarda a versão compartilhada de ('Treino', None). Um commit deste
+    processo aplica os seus deltas só se a versão anterior à gravação for a guardada; se outro
+    processo alterou fichas no meio, ou a versão sincronizada no início da requisição for outra,
+    a próxima leitura recarrega. 'intervalo_recarga' cobre alterações feitas direto no banco.
+    """
+
+    DEPENDENCIA = ('Treino', None)
+
+    def __init__(self, intervalo_recarga=600):
+        self.intervalo_recarga = intervalo_recarga
+        self._lock = threading.Lock()
+        self._carregado_em = None
+        self._versoes = None  # (TUDO, fichas) da carga, avançada pelos deltas
+        self._fichas_por_par = Counter()
+        self._itens_por_exercicio = Counter()
+
+    @staticmethod
+    def versoes_atuais():
+        return versoes_entidades.versao(VersoesEntidades.TUDO), \
+            versoes_entidades.versao(EstatisticasDetalhadas.DEPENDENCIA)
+
+    def _recarregar(self):
+        versoes = self.versoes_atuais()  # antes das consultas: dados mais novos só causam outra recarga
+        fichas = Counter()
+        for funcionario_id, aluno_id, total in db.session.query(
+                Treino.funcionario_id, Treino.aluno_id, func.count(Treino.id)
+        ).filter(Treino.funcionario_id.isnot(None)).group_by(Treino.funcionario_id, Treino.aluno_id):
+            fichas[(funcionario_id, aluno_id)] = total
+        itens = Counter(dict(db.session.query(
+            ItemTreino.exercicio_id, func.count(ItemTreino.id)
+        ).group_by(ItemTreino.exercicio_id).all()))
+        with self._lock:
+            self._fichas_por_par = fichas
+            self._itens_por_exercicio = itens
+            self._versoes = versoes
+            self._carregado_em = time.monotonic()
+
+    def aplicar(self, deltas_fichas, deltas_itens, anteriores, gravadas):
+        """Deltas de um commit deste processo; 'anteriores'/'gravadas' vêm de versoes_entidades.gravar."""
+        chave = VersoesEntidades.texto_da_chave(self.DEPENDENCIA)
+        with self._lock:
+            if self._carregado_em is None:
+                return
+            tudo, fichas = self._versoes
+            if chave not in gravadas or anteriores.get(chave) != fichas or \
+                    versoes_entidades.versao(VersoesEntidades.TUDO) != tudo:
+                self._carregado_em = None
+                return
+            self._versoes = (tudo, gravadas[chave])
+            self._fichas_por_par.update(deltas_fichas)
+            self._itens_por_exercicio.update(deltas_itens)
+            self._fichas_por_par = +self._fichas_por_par
+            self._itens_por_exercicio = +self._itens_por_exercicio
+
+    def invalidar(self):
+        with self._lock:
+            self._carregado_em = None
+
+    def resumo(self, limite=5):
+        with self._lock:
+            expirado = self._carregado_em is None or self._versoes != self.versoes_atuais() or \
+                time.monotonic() - self._carregado_em > self.intervalo_recarga
+        if expirado:
+            self._recarregar()
+        with self._lock:
+            alunos_por_professor = Counter(funcionario_id for funcionario_id, _ in self._fichas_por_par)
+            return alunos_por_professor.most_common(limite), self._itens_por_exercicio.most_common(limite)
+
+estatisticas_detalhadas = estado_da_aplicacao('estatisticas_detalhadas')
+
+@event.listens_for(Session, 'after_flush')
+def registrar_alteracoes_dashboard(session, flush_context):
+    # Os caches do dashboard seguem as versões compartilhadas; aqui só os deltas das estatísticas detalhadas
+    alterados = list(session.new) + list(session.dirty) + list(session.deleted)
+    if not any(isinstance(obj, (Treino, ItemTreino)) for obj in alterados):
+        return
+    session.info['dashboard_alterado'] = True
+    deltas_fichas = session.info.setdefault('dashboard_deltas_fichas', Counter())
+    deltas_itens = session.info.setdefault('dashboard_deltas_itens', Counter())
+    for obj in session.new:
+        if isinstance(obj, Treino) and obj.funcionario_id:
+            deltas_fichas[(obj.funcionario_id, obj.aluno_id)] += 1
+        elif isinstance(obj, ItemTreino):
+            deltas_itens[obj.exercicio_id] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Treino):
+            funcionario_id = valor_anterior(obj, 'funcionario_id')
+            if funcionario_id:
+                deltas_fichas[(funcionario_id, valor_anterior(obj, 'aluno_id'))] -= 1
+        elif isinstance(obj, ItemTreino):
+            deltas_itens[valor_anterior(obj, 'exercicio_id')] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Treino):
+            antes = (valor_anterior(obj, 'funcionario_id'), valor_anterior(obj, 'aluno_id'))
+            depois = (obj.funcionario_id, obj.aluno_id)
+            if antes != depois:
+                if antes[0]:
+                    deltas_fichas[antes] -= 1
+                if depois[0]:
+                    deltas_fichas[depois] += 1
+        elif isinstance(obj, ItemTreino):
+            antes = valor_anterior(obj, 'exercicio_id')
+            if antes != obj.exercicio_id:
+                deltas_itens[antes] -= 1
+                deltas_itens[obj.exercicio_id] += 1
+
+@event.listens_for(Session, 'after_commit', insert=True)
+def aplicar_alteracoes_dashboard(session):
+    # No início da lista: roda antes de aplicar_versoes, que consome 'versoes_anteriores' e 'versoes_gravadas'
+    if session.info.pop('dashboard_alterado', False):
+        estatisticas_detalhadas.aplicar(session.info.pop('dashboard_deltas_fichas', Counter()),
+                                        session.info.pop('dashboard_deltas_itens', Counter()),
+                                        session.info.get('versoes_anteriores', {}),
+                                        session.info.get('versoes_gravadas', {}))
+
+@event.listens_for(Session, 'after_rollback')
+def descartar_alteracoes_dashboard(session):
+    for chave in ('dashboard_alterado', 'dashboard_deltas_fichas', 'dashboard_deltas_itens', 'versoes_alteradas',
+                  'versoes_gravadas', 'versoes_anteriores', 'tarefas_novas'):
+        session.info.pop(chave, None)
+
+def painel_detalhado():
+    professores, exercicios = estatisticas_detalhadas.resumo()
+    nomes_professores = dict(db.session.query(Funcionario.id, Funcionario.nome)
+                             .filter(Funcionario.id.in_([i for i, _ in professores])))
+    nomes_exercicios = dict(db.session.query(Exercicio.id, Exercicio.nome)
+                            .filter(Exercicio.id.in_([i for i, _ in exercicios])))
+    return {
+        'alunos_por_professor': [(nomes_professores[i], total) for i, total in professores if i in nomes_professores],
+        'exercicios_mais_prescritos': [(nomes_exercicios[i], total) for i, total in exercicios if i in nomes_exercicios],
+    }
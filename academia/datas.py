@@ -0,0 +1,34 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import or_
+
+from .modelos import Aluno
+
+def ler_data(valor):
+    """Converte 'AAAA-MM-DD' (input date) ou 'DD/MM/AAAA' em date; valores vazios ou inválidos viram None."""
+    if isinstance(valor, date):
+        return valor
+    valor = (valor or '').strip()
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    return None
+
+def matriculados_no_periodo(inicio, fim):
+    return Aluno.query.filter(Aluno.data_matricula.between(inicio, fim))
+
+def aniversariantes_entre(inicio, fim):
+    dia_inicio = inicio.month * 100 + inicio.day
+    dia_fim = fim.month * 100 + fim.day
+    if dia_inicio <= dia_fim:
+        filtro = Aluno.dia_aniversario.between(dia_inicio, dia_fim)
+    else:  # intervalo que atravessa a virada do ano
+        filtro = or_(Aluno.dia_aniversario >= dia_inicio, Aluno.dia_aniversario <= dia_fim)
+    return Aluno.query.filter(filtro)
+
+def aniversariantes_da_semana(hoje=None):
+    hoje = hoje or date.today()
+    inicio = hoje - timedelta(days=hoje.weekday())
+    return aniversariantes_entre(inicio, inicio + timedelta(days=6)).order_by(Aluno.dia_aniversario, Aluno.nome).all()
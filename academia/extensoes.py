@@ -0,0 +1,28 @@
+from flask import current_app
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import LoginManager
+from sqlalchemy import event
+from werkzeug.local import LocalProxy
+
+db = SQLAlchemy()
+
+def aplicar_pragmas_sqlite(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def configurar_conexao(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome} = {valor}')
+        cursor.close()
+
+login_manager = LoginManager()
+login_manager.login_view = 'principal.login'
+# Na API, sem sessão a resposta é 401 em vez do redirecionamento para o login
+login_manager.blueprint_login_views['api'] = None
+
+def estado_da_aplicacao(nome):
+    """Objeto 'nome' da aplicação atual, criado em create_app (ver EstadoAplicacao).
+
+    Caches, versões, métricas, fila e buffers pertencem à aplicação, não ao módulo: duas aplicações
+    no mesmo processo (testes, bancos diferentes) nunca enxergam os dados uma da outra.
+    """
+    return LocalProxy(lambda: getattr(current_app.extensions['academia'], nome))
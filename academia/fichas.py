@@ -0,0 +1,200 @@
+import os
+import hashlib
+import tempfile
+import zlib
+
+from flask import current_app, stream_template
+from sqlalchemy import select
+
+from .extensoes import db
+from .modelos import Aluno, Exercicio, Funcionario, ItemTreino, Treino
+from .modelos_treino import dividir_em_lotes
+
+# --- Fichas para impressão (HTML compacto e PDF) com cache em disco ---
+# A ficha é montada com três consultas e identificada por um hash das suas linhas: enquanto nada
+# mudar, a mesma impressão é servida do disco. Na primeira vez, o arquivo é enviado à medida que
+# é gerado e gravado ao mesmo tempo; só entra no cache se a geração terminar.
+
+VERSAO_FICHA = 1  # mude ao alterar o layout para descartar as fichas em cache
+FORMATOS_FICHA = {'pdf': 'application/pdf', 'html': 'text/html; charset=utf-8'}
+
+def dados_fichas(aluno_ids):
+    """{aluno_id: (nome, cpf, ((ficha, professor, ((exercício, séries, repetições, descanso, obs), ...)), ...))}"""
+    resultado = {}
+    for lote in dividir_em_lotes(list(aluno_ids), current_app.config['ATRIBUICAO_TAMANHO_LOTE']):
+        itens = {}
+        for treino_id, *item in db.session.execute(
+            select(ItemTreino.treino_id, Exercicio.nome, ItemTreino.series, ItemTreino.repeticoes,
+                   ItemTreino.descanso_seg, ItemTreino.observacoes)
+            .join(ItemTreino.exercicio).join(ItemTreino.treino)
+            .where(Treino.aluno_id.in_(lote)).order_by(ItemTreino.treino_id, ItemTreino.id)
+        ):
+            itens.setdefault(treino_id, []).append(tuple(item))
+        fichas = {}
+        for treino_id, aluno_id, nome, professor in db.session.execute(
+            select(Treino.id, Treino.aluno_id, Treino.nome, Funcionario.nome)
+            .outerjoin(Treino.funcionario).where(Treino.aluno_id.in_(lote)).order_by(Treino.id)
+        ):
+            fichas.setdefault(aluno_id, []).append((nome, professor, tuple(itens.get(treino_id, ()))))
+        for aluno_id, nome, cpf in db.session.execute(
+                select(Aluno.id, Aluno.nome, Aluno.cpf).where(Aluno.id.in_(lote))):
+            resultado[aluno_id] = (nome, cpf, tuple(fichas.get(aluno_id, ())))
+    return resultado
+
+def chave_ficha(dados, formato):
+    return hashlib.sha256(repr((VERSAO_FICHA, formato, dados)).encode('utf-8')).hexdigest()[:32]
+
+def diretorio_fichas():
+    diretorio = current_app.config['FICHAS_DIRETORIO'] or os.path.join(current_app.instance_path, 'fichas')
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+def gravar_enquanto_envia(partes, destino):
+    """Repassa cada bloco e o grava num temporário, publicado em 'destino' só no fim da geração."""
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    concluido = False
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            for parte in partes:
+                parte = parte.encode('utf-8') if isinstance(parte, str) else parte
+                arquivo.write(parte)
+                yield parte
+        os.replace(temporario, destino)
+        concluido = True
+    finally:
+        # Cliente desconectado ou erro na geração: o arquivo incompleto não vai para o cache
+        if not concluido and os.path.exists(temporario):
+            os.remove(temporario)
+
+# PDF escrito à mão (sem dependências): fontes padrão Helvetica em WinAnsiEncoding, que cobre os
+# acentos do português. Cada página é enviada assim que fica pronta; a tabela xref vai no fim.
+
+LARGURA_PDF, ALTURA_PDF, MARGEM_PDF, LINHA_PDF = 595, 842, 40, 14
+COLUNAS_PDF = (('Exercício', 200), ('Séries', 50), ('Repetições', 70), ('Descanso', 55), ('Observações', 140))
+
+def _texto_pdf(valor):
+    texto = str(valor).encode('cp1252', 'replace')
+    return b'(' + texto.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+def _cortar(valor, largura, tamanho):
+    # Helvetica tem em média ~0,5 em por caractere; suficiente para não invadir a coluna seguinte
+    valor = '' if valor is None else str(valor)
+    maximo = int(largura / (tamanho * 0.5))
+    return valor if len(valor) <= maximo else valor[:maximo - 1] + '…'
+
+class PaginaPdf:
+    def __init__(self, numero, nome):
+        self.operacoes = []
+        self.y = ALTURA_PDF - MARGEM_PDF
+        self.texto(MARGEM_PDF, f'Ficha de Treino · {nome}', b'F2', 9)
+        self.texto(LARGURA_PDF - MARGEM_PDF - 45, f'Página {numero}', b'F1', 9)
+        self.avancar(LINHA_PDF)
+        self.linha()
+
+    def texto(self, x, valor, fonte=b'F1', tamanho=9):
+        self.operacoes.append(b'BT /%s %d Tf %.1f %.1f Td %s Tj ET' % (fonte, tamanho, x, self.y, _texto_pdf(valor)))
+
+    def linha(self):
+        self.operacoes.append(b'%d %.1f m %d %.1f l S' % (MARGEM_PDF, self.y + 4, LARGURA_PDF - MARGEM_PDF, self.y + 4))
+
+    def avancar(self, altura):
+        self.y -= altura
+
+    def cabe(self, linhas):
+        return self.y - linhas * LINHA_PDF >= MARGEM_PDF
+
+    def colunas(self, valores, fonte=b'F1'):
+        x = MARGEM_PDF
+        for valor, (_, largura) in zip(valores, COLUNAS_PDF):
+            self.texto(x, _cortar(valor, largura, 9), fonte)
+            x += largura
+        self.avancar(LINHA_PDF)
+
+    def conteudo(self):
+        return b'\n'.join(self.operacoes)
+
+def paginas_ficha(dados):
+    """Gera o conteúdo de cada página da ficha, uma por vez."""
+    nome, cpf, treinos = dados
+    numero = 1
+    pagina = PaginaPdf(numero, nome)
+    pagina.avancar(LINHA_PDF)
+    pagina.texto(MARGEM_PDF, nome, b'F2', 16)
+    pagina.avancar(LINHA_PDF + 4)
+    pagina.texto(MARGEM_PDF, f'CPF: {cpf}')
+    pagina.avancar(LINHA_PDF * 2)
+    if not treinos:
+        pagina.texto(MARGEM_PDF, 'Nenhuma ficha de treino cadastrada.')
+    for treino, professor, itens in treinos:
+        for posicao, item in enumerate(itens or (None,)):
+            # Título + cabeçalho + primeira linha juntos; nas quebras o cabeçalho da tabela se repete
+            if not pagina.cabe(4 if posicao == 0 else 1):
+                yield pagina.conteudo()
+                numero += 1
+                pagina = PaginaPdf(numero, nome)
+                pagina.avancar(LINHA_PDF)
+                if posicao:
+                    pagina.colunas([titulo for titulo, _ in COLUNAS_PDF], b'F2')
+            if posicao == 0:
+                pagina.texto(MARGEM_PDF, treino, b'F2', 12)
+                if professor:
+                    pagina.texto(LARGURA_PDF - MARGEM_PDF - 200, _cortar(f'Professor: {professor}', 200, 9))
+                pagina.avancar(LINHA_PDF + 2)
+                pagina.colunas([titulo for titulo, _ in COLUNAS_PDF], b'F2')
+                pagina.linha()
+            if item is None:
+                pagina.texto(MARGEM_PDF, 'Nenhum exercício nesta ficha.')
+                pagina.avancar(LINHA_PDF)
+            else:
+                exercicio, series, repeticoes, descanso, observacoes = item
+                pagina.colunas([exercicio, series, repeticoes, f'{descanso}s' if descanso is not None else '',
+                                observacoes])
+        pagina.avancar(LINHA_PDF)
+    yield pagina.conteudo()
+
+def gerar_pdf(paginas):
+    posicoes = {}
+    tamanho = 0
+
+    def objeto(numero, corpo):
+        nonlocal tamanho
+        bloco = b'%d 0 obj\n%s\nendobj\n' % (numero, corpo)
+        posicoes[numero] = tamanho
+        tamanho += len(bloco)
+        return bloco
+
+    cabecalho = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    tamanho = len(cabecalho)
+    yield cabecalho
+    yield objeto(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>') + \
+        objeto(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+    # 1 e 2 (catálogo e árvore de páginas) só são escritos no fim, quando as páginas são conhecidas
+    numero = 5
+    paginas_ids = []
+    for conteudo in paginas:
+        comprimido = zlib.compress(conteudo)
+        yield objeto(numero, b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (
+            len(comprimido), comprimido)) + \
+            objeto(numero + 1, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                               b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>' % (
+                                   LARGURA_PDF, ALTURA_PDF, numero))
+        paginas_ids.append(numero + 1)
+        numero += 2
+    yield objeto(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % pagina_id for pagina_id in paginas_ids), len(paginas_ids))) + \
+        objeto(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    xref = [b'xref\n0 %d\n0000000000 65535 f \n' % numero]
+    xref += [b'%010d 00000 n \n' % posicoes[i] for i in range(1, numero)]
+    yield b''.join(xref) + b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (numero, tamanho)
+
+def gerar_ficha(dados, formato):
+    if formato == 'pdf':
+        return gerar_pdf(paginas_ficha(dados))
+    nome, cpf, treinos = dados
+    return stream_template('ficha_impressao.html', nome=nome, cpf=cpf, treinos=treinos)
+
+def gravar_pdf_ficha(dados, destino):
+    # Roda nos processos do 'flask gerar-fichas': recebe só dados, sem banco nem contexto da aplicação
+    for _ in gravar_enquanto_envia(gerar_pdf(paginas_ficha(dados)), destino):
+        pass
+    return destino
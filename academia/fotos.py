@@ -0,0 +1,173 @@
+import os
+import re
+import threading
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.utils import secure_filename
+from flask import current_app, request, url_for
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # sem Pillow as fotos são servidas no tamanho original
+    Image = None
+
+from .extensoes import db, estado_da_aplicacao
+from .modelos import Aluno, Funcionario
+from .versoes import versoes_entidades
+from .tarefas import enfileirar, tarefa
+
+# --- Fotos: gravação com hash do conteúdo e miniaturas geradas em segundo plano ---
+
+FOTO_PADRAO = 'default.png'
+PADRAO_FOTO_HASH = re.compile(r'^[0-9a-f]{32}(_[a-z]+\.webp|\.[a-z0-9]+)?$')
+
+class ExecutorImagens:
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = (None, None)
+        self._lock = threading.Lock()
+
+    def obter(self):
+        # Threads não sobrevivem ao fork: cada processo (worker) cria o seu pool no primeiro uso
+        with self._lock:
+            pid, executor = self._executor
+            if pid != os.getpid():
+                executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='imagens')
+                self._executor = (os.getpid(), executor)
+            return executor
+
+executor_imagens = estado_da_aplicacao('executor_imagens')
+
+def caminho_foto(nome):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], nome)
+
+def nome_variante(nome, variante):
+    return f"{os.path.splitext(nome)[0]}_{variante}.webp"
+
+def gerar_variantes(nome, pasta, variantes):
+    # Roda fora do contexto da aplicação (thread do executor), por isso recebe pasta e variantes
+    if Image is None:
+        return
+    with Image.open(os.path.join(pasta, nome)) as original:
+        imagem = ImageOps.exif_transpose(original).convert('RGB')
+    for variante, tamanho in variantes.items():
+        copia = imagem.copy()
+        copia.thumbnail((tamanho, tamanho))
+        destino = os.path.join(pasta, nome_variante(nome, variante))
+        temporario = destino + '.tmp'
+        copia.save(temporario, 'WEBP', quality=80)
+        os.replace(temporario, destino)
+
+def salvar_foto(arquivo):
+    """Grava o upload em blocos calculando o hash; arquivos idênticos são guardados uma só vez."""
+    extensao = os.path.splitext(secure_filename(arquivo.filename))[1].lower()
+    digest = hashlib.sha256()
+    descritor, temporario = tempfile.mkstemp(dir=current_app.config['UPLOAD_FOLDER'], suffix='.upload')
+    with os.fdopen(descritor, 'wb') as destino:
+        for bloco in iter(lambda: arquivo.stream.read(64 * 1024), b''):
+            digest.update(bloco)
+            destino.write(bloco)
+
+    nome = digest.hexdigest()[:32] + extensao
+    if os.path.exists(caminho_foto(nome)):
+        # Uma remoção em andamento ainda pode apagá-la: a cópia fica até o commit (ver conferir_fotos_reaproveitadas)
+        reaproveitadas = db.session.info.setdefault('fotos_reaproveitadas', {})
+        if nome in reaproveitadas:
+            os.remove(temporario)
+        else:
+            reaproveitadas[nome] = temporario
+    else:
+        os.replace(temporario, caminho_foto(nome))
+        # Gravada junto com o cadastro que usa a foto
+        enfileirar('gerar_miniaturas', nome=nome)
+    return nome
+
+@event.listens_for(Session, 'after_commit')
+def conferir_fotos_reaproveitadas(session):
+    for nome, temporario in session.info.pop('fotos_reaproveitadas', {}).items():
+        if os.path.exists(caminho_foto(nome)):
+            os.remove(temporario)
+        else:  # removida entre o upload e o commit: volta a partir da cópia
+            os.replace(temporario, caminho_foto(nome))
+            gerar_miniaturas(nome)
+
+@event.listens_for(Session, 'after_rollback')
+def descartar_fotos_reaproveitadas(session):
+    for temporario in session.info.pop('fotos_reaproveitadas', {}).values():
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+
+def descartar_fotos_sem_commit(erro=None):
+    # Sessão encerrada sem commit nem rollback (nenhuma consulta depois do upload)
+    descartar_fotos_reaproveitadas(db.session)
+
+def marcar_fotos_alteradas(nomes):
+    # Páginas e ETags já renderizadas apontam para a original (url_foto sem variante): nova versão para quem usa a foto
+    gravadas = {}
+    with db.engine.begin() as conexao:
+        chaves = set()
+        for modelo in (Aluno, Funcionario):
+            for (registro_id,) in conexao.execute(select(modelo.id).where(modelo.foto.in_(nomes))):
+                chaves.update({(modelo.__name__, registro_id), (modelo.__name__, None)})
+        if chaves:
+            gravadas = versoes_entidades.gravar(conexao, chaves)
+    if gravadas:
+        versoes_entidades.aplicar(gravadas)
+
+@tarefa()
+def gerar_miniaturas(nome):
+    if os.path.exists(caminho_foto(nome)):  # a foto pode ter sido removida antes de a tarefa rodar
+        gerar_variantes(nome, current_app.config['UPLOAD_FOLDER'], current_app.config['FOTO_VARIANTES'])
+        marcar_fotos_alteradas([nome])
+
+def foto_enviada():
+    arquivo = request.files.get('foto')
+    if arquivo and arquivo.filename != '':
+        return salvar_foto(arquivo)
+    return None
+
+def agendar_remocao_foto(nome):
+    # A tarefa só é gravada com o commit que deixa a foto sem dono
+    if nome and nome != FOTO_PADRAO:
+        enfileirar('remover_foto', nome=nome)
+
+def foto_em_uso(nome):
+    # Com deduplicação a mesma foto pode pertencer a mais de uma pessoa
+    return db.session.query(Aluno.id).filter_by(foto=nome).first() is not None or \
+        db.session.query(Funcionario.id).filter_by(foto=nome).first() is not None
+
+@tarefa()
+def remover_foto(nome):
+    if not nome or nome == FOTO_PADRAO or foto_em_uso(nome):
+        return
+    # Um upload do mesmo arquivo pode ser gravado depois da consulta: os arquivos saem do lugar,
+    # o uso é conferido de novo numa transação nova e só então são apagados ou devolvidos
+    movidos = []
+    for arquivo in [nome] + [nome_variante(nome, v) for v in current_app.config['FOTO_VARIANTES']]:
+        try:
+            os.replace(caminho_foto(arquivo), caminho_foto(arquivo) + '.removida')
+            movidos.append(caminho_foto(arquivo))
+        except OSError:
+            pass
+    db.session.rollback()
+    devolver = foto_em_uso(nome)
+    for caminho in movidos:
+        try:
+            if devolver:
+                os.replace(caminho + '.removida', caminho)
+            else:
+                os.remove(caminho + '.removida')
+        except OSError:
+            pass
+
+def url_foto(nome, variante=None):
+    nome = nome or FOTO_PADRAO
+    if variante and os.path.exists(caminho_foto(nome_variante(nome, variante))):
+        nome = nome_variante(nome, variante)
+    return url_for('fotos.arquivo_foto', nome=nome)
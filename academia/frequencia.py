@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import threading
+import atexit
+from datetime import date, datetime, timedelta
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as insert_postgresql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+
+from .extensoes import db, estado_da_aplicacao
+from .modelos import Aluno, Frequencia, OcupacaoHora
+from .busca import somente_digitos
+from .versoes import VersoesEntidades, versoes_entidades
+from .dashboard import cache_dashboard
+
+# --- Frequência: check-in na recepção por CPF ou cartão ---
+# Pensado para o pico da recepção: o aluno é encontrado num índice em memória (sem consulta por
+# leitura), o check-in vai para um buffer e um thread grava os acumulados em lote, somando na
+# mesma transação os contadores por dia e hora que alimentam o dashboard.
+
+class IndiceAlunos:
+    """CPF (só dígitos) e cartão -> (id, nome, status), carregado de uma vez e a cada 'ttl' segundos.
+
+    Cada entrada guarda a versão ('Aluno', id) de quando foi lida; se ela mudou no espelho de
+    versoes_entidades (commits de qualquer processo), a entrada é descartada e o aluno procurado de
+    novo no banco. Alterações fora do ORM mudam a versão TUDO e recarregam o índice inteiro. Uma chave
+    não encontrada também é procurada no banco e guardada, o que cobre os alunos novos.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._carregado_em = None
+        self._versao_tudo = None
+        self._por_chave = {}
+        self._chaves_por_id = {}
+
+    def _guardar(self, aluno_id, nome, status, cpf, cartao, versao):
+        chaves = [('cpf', somente_digitos(cpf))] + ([('cartao', cartao)] if cartao else [])
+        for chave in self._chaves_por_id.get(aluno_id, ()):
+            self._por_chave.pop(chave, None)
+        for chave in chaves:
+            self._por_chave[chave] = (aluno_id, nome, status, versao)
+        self._chaves_por_id[aluno_id] = chaves
+
+    def _carregar(self):
+        # Versões lidas antes da consulta: uma alteração no meio deixa a entrada com versão antiga e ela é relida
+        versao_tudo = versoes_entidades.versao(VersoesEntidades.TUDO)
+        linhas = db.session.execute(select(Aluno.id, Aluno.nome, Aluno.status, Aluno.cpf, Aluno.cartao)).all()
+        versoes = {linha[0]: versoes_entidades.versao(('Aluno', linha[0])) for linha in linhas}
+        with self._lock:
+            self._por_chave, self._chaves_por_id = {}, {}
+            for linha in linhas:
+                self._guardar(*linha, versoes[linha[0]])
+            self._carregado_em = time.monotonic()
+            self._versao_tudo = versao_tudo
+
+    def buscar(self, tipo, codigo):
+        valor = somente_digitos(codigo) if tipo == 'cpf' else codigo.strip()
+        with self._lock:
+            expirado = self._carregado_em is None or time.monotonic() - self._carregado_em > self.ttl or \
+                self._versao_tudo != versoes_entidades.versao(VersoesEntidades.TUDO)
+        if expirado:
+            self._carregar()
+        with self._lock:
+            encontrado = self._por_chave.get((tipo, valor))
+        if encontrado is not None:
+            if encontrado[3] == versoes_entidades.versao(('Aluno', encontrado[0])):
+                return encontrado[:3]
+            self.remover([encontrado[0]])
+        if not valor:
+            return None
+        if tipo == 'cpf':
+            # O CPF é gravado como digitado: com ou sem pontuação
+            valores = [valor, f'{valor[:3]}.{valor[3:6]}.{valor[6:9]}-{valor[9:]}'] if len(valor) == 11 else [valor]
+            filtro = Aluno.cpf.in_(valores)
+        else:
+            filtro = Aluno.cartao == valor
+        linha = db.session.execute(
+            select(Aluno.id, Aluno.nome, Aluno.status, Aluno.cpf, Aluno.cartao).where(filtro)).first()
+        if linha is None:
+            return None
+        # A versão do espelho é de antes da consulta (sincronizar_versoes, no início da requisição)
+        with self._lock:
+            self._guardar(*linha, versoes_entidades.versao(('Aluno', linha[0])))
+        return tuple(linha[:3])
+
+    def remover(self, aluno_ids):
+        with self._lock:
+            for aluno_id in aluno_ids:
+                for chave in self._chaves_por_id.pop(aluno_id, ()):
+                    self._por_chave.pop(chave, None)
+
+    def invalidar(self):
+        with self._lock:
+            self._carregado_em = None
+
+indice_alunos = estado_da_aplicacao('indice_alunos')
+
+def somar_ocupacao(conexao, contagens):
+    """Soma {(dia, hora): check-ins} em ocupacao_horas com um upsert por par."""
+    tabela = OcupacaoHora.__table__
+    linhas = [{'dia': dia, 'hora': hora, 'total': total} for (dia, hora), total in contagens.items()]
+    if conexao.dialect.name in ('sqlite', 'postgresql'):
+        inserir = (insert_sqlite if conexao.dialect.name == 'sqlite' else insert_postgresql)(tabela)
+        conexao.execute(inserir.on_conflict_do_update(
+            index_elements=['dia', 'hora'], set_={'total': tabela.c.total + inserir.excluded.total}), linhas)
+        return
+    for linha in linhas:
+        somados = conexao.execute(tabela.update().where(tabela.c.dia == linha['dia'], tabela.c.hora == linha['hora'])
+                                  .values(total=tabela.c.total + linha['total'])).rowcount
+        if not somados:
+            conexao.execute(tabela.insert(), linha)
+
+class BufferFrequencia:
+    """Check-ins aceitos esperam em memória e são gravados em lote numa transação.
+
+    O thread do processo grava a cada 'intervalo' segundos ou assim que o lote enche, e o que
+    restar é gravado na saída normal do processo. Um novo check-in do mesmo aluno dentro de
+    'repeticao' segundos (leitura dupla do cartão) é ignorado: já na chegada, contra os deste
+    processo, e na gravação, contra a tabela de frequência (check-ins feitos em outros processos).
+    Um lote que falha volta para a fila; depois de 'max_tentativas' falhas seguidas ele sai da
+    memória e vai para <instance>/checkins_descartados.jsonl, de onde pode ser recuperado.
+    """
+
+    def __init__(self, intervalo, tamanho_lote, repeticao, max_tentativas=5):
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self.repeticao = repeticao
+        self.max_tentativas = max_tentativas
+        self._lock = threading.Lock()
+        self._lote_cheio = threading.Event()
+        self._pendentes = []
+        self._ultimos = {}
+        self._thread = (None, None)
+        self.gravados = 0
+        self.repetidos = 0
+        self.lotes = 0
+        self.falhas_seguidas = 0
+        self.descartados = 0
+
+    def registrar(self, aluno_id, origem):
+        agora = time.monotonic()
+        with self._lock:
+            ultimo = self._ultimos.get(aluno_id)
+            if ultimo is not None and agora - ultimo < self.repeticao:
+                return False
+            self._ultimos[aluno_id] = agora
+            self._pendentes.append({'aluno_id': aluno_id, 'registrada_em': datetime.now(), 'origem': origem})
+            cheio = len(self._pendentes) >= self.tamanho_lote
+        if cheio:
+            self._lote_cheio.set()
+        return True
+
+    def gravar(self):
+        with self._lock:
+            lote, self._pendentes = self._pendentes, []
+            limite = time.monotonic() - self.repeticao
+            self._ultimos = {aluno_id: momento for aluno_id, momento in self._ultimos.items() if momento > limite}
+        if not lote:
+            return 0
+        try:
+            with db.engine.begin() as conexao:
+                # Primeiro a escrita: a linha de sequência fica bloqueada e outro lote só lê depois deste commit
+                gravadas = versoes_entidades.gravar(conexao, [('Frequencia', None)])
+                aceitos = self._sem_repeticoes(conexao, lote)
+                if aceitos:
+                    conexao.execute(Frequencia.__table__.insert(), aceitos)
+                    somar_ocupacao(conexao, Counter(
+                        (registro['registrada_em'].date(), registro['registrada_em'].hour) for registro in aceitos))
+        except Exception:
+            with self._lock:
+                self.falhas_seguidas += 1
+                desistir = self.falhas_seguidas >= self.max_tentativas
+                if desistir:
+                    self.falhas_seguidas = 0
+                    self.descartados += len(lote)
+                else:  # o lote volta para a frente da fila e vai de novo no próximo ciclo
+                    self._pendentes[:0] = lote
+            if desistir:
+                self.descartar(lote)
+            raise
+        versoes_entidades.aplicar(gravadas)
+        with self._lock:
+            self.gravados += len(aceitos)
+            self.repetidos += len(lote) - len(aceitos)
+            self.lotes += 1
+            self.falhas_seguidas = 0
+        return len(aceitos)
+
+    def _sem_repeticoes(self, conexao, lote):
+        janela = timedelta(seconds=self.repeticao)
+        momentos = [registro['registrada_em'] for registro in lote]
+        tabela = Frequencia.__table__
+        anteriores = {}
+        for aluno_id, registrada_em in conexao.execute(select(tabela.c.aluno_id, tabela.c.registrada_em).where(
+                tabela.c.aluno_id.in_({registro['aluno_id'] for registro in lote}),
+                tabela.c.registrada_em > min(momentos) - janela, tabela.c.registrada_em < max(momentos) + janela)):
+            anteriores.setdefault(aluno_id, []).append(registrada_em)
+        aceitos = []
+        for registro in sorted(lote, key=lambda registro: registro['registrada_em']):
+            vistos = anteriores.setdefault(registro['aluno_id'], [])
+            if all(abs(registro['registrada_em'] - momento) >= janela for momento in vistos):
+                vistos.append(registro['registrada_em'])
+                aceitos.append(registro)
+        return aceitos
+
+    def descartar(self, lote):
+        caminho = os.path.join(current_app.instance_path, 'checkins_descartados.jsonl')
+        os.makedirs(current_app.instance_path, exist_ok=True)
+        with open(caminho, 'a', encoding='utf-8') as arquivo:
+            for registro in lote:
+                arquivo.write(json.dumps(registro, default=str) + '\n')
+        current_app.logger.error('Check-in: %d registro(s) descartados após %d falhas seguidas, gravados em %s',
+                                 len(lote), self.max_tentativas, caminho)
+
+    def iniciar_thread(self, app):
+        with self._lock:
+            pid, thread = self._thread
+            if pid == os.getpid() and thread.is_alive():
+                return
+            thread = threading.Thread(target=self.laco, args=(app,), name='frequencia', daemon=True)
+            thread.start()
+            if pid != os.getpid():
+                atexit.register(self.gravar_ao_sair, app)
+            self._thread = (os.getpid(), thread)
+
+    def laco(self, app):
+        while True:
+            self._lote_cheio.wait(self.intervalo)
+            self._lote_cheio.clear()
+            try:
+                with app.app_context():
+                    self.gravar()
+            except Exception:
+                app.logger.exception('Check-in: falha ao gravar o lote, nova tentativa em %ss', self.intervalo)
+
+    def gravar_ao_sair(self, app):
+        with app.app_context():
+            self.gravar()
+
+buffer_frequencia = estado_da_aplicacao('buffer_frequencia')
+
+def registrar_checkin(tipo, codigo):
+    """Devolve ((id, nome, status) ou None, situação): registrado, repetido, inativo ou desconhecido."""
+    aluno = indice_alunos.buscar(tipo, codigo)
+    if aluno is None:
+        return None, 'desconhecido'
+    if aluno[2] != 'Ativo':
+        return aluno, 'inativo'
+    if not buffer_frequencia.registrar(aluno[0], tipo):
+        return aluno, 'repetido'
+    if buffer_frequencia.intervalo <= 0:
+        try:
+            buffer_frequencia.gravar()
+        except Exception:
+            # O lote continua no buffer (ou foi descartado para o arquivo) e vai na próxima gravação
+            current_app.logger.exception('Check-in: falha ao gravar o lote')
+            return aluno, 'falhou'
+    else:
+        buffer_frequencia.iniciar_thread(current_app._get_current_object())
+    return aluno, 'registrado'
+
+def ocupacao_recente(dias=7):
+    hoje = date.today()
+    por_hora = [0] * 24
+    por_dia = Counter()
+    for dia, hora, total in db.session.query(OcupacaoHora.dia, OcupacaoHora.hora, OcupacaoHora.total) \
+            .filter(OcupacaoHora.dia > hoje - timedelta(days=dias)):
+        por_dia[dia] += total
+        if dia == hoje:
+            por_hora[hora] = total
+    return {
+        'hoje': por_dia[hoje],
+        'hora_atual': por_hora[datetime.now().hour],
+        'por_hora': por_hora,
+        'por_dia': [(hoje - timedelta(days=n), por_dia[hoje - timedelta(days=n)]) for n in range(dias - 1, -1, -1)],
+    }
+
+def ocupacao_em_cache():
+    # ('Frequencia', None) muda a cada lote de check-ins gravado, por qualquer processo
+    return cache_dashboard.obter('ocupacao', ocupacao_recente, versoes_entidades.assinatura(('Frequencia', None)))
+
+MENSAGENS_CHECKIN = {
+    'registrado': ('Check-in registrado: {nome}.', 'success'),
+    'repetido': ('{nome} já fez check-in há poucos minutos.', 'warning'),
+    'inativo': ('Matrícula de {nome} está inativa.', 'danger'),
+    'desconhecido': ('Nenhum aluno encontrado para este código.', 'danger'),
+    'falhou': ('Check-in de {nome} recebido, mas a gravação falhou; ele será gravado na próxima tentativa.', 'warning'),
+}
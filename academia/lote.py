@@ -0,0 +1,340 @@
+import os
+import re
+import io
+import csv
+import functools
+import json
+import click
+import multiprocessing
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
+
+from .extensoes import db
+from .modelos import Aluno, Exercicio, Funcionario, GrupoMuscular, ItemTreino, Treino, exercicio_grupo
+from .datas import ler_data
+from .busca import INDICES_BUSCA, indexar_ids
+from .versoes import versoes_entidades
+from .fotos import FOTO_PADRAO
+
+# --- Importação e exportação em lote (CSV, JSON Lines ou JSON) ---
+# Os registros são validados um a um e gravados em lotes com executemany, uma transação por lote.
+
+CAMPOS_LOTE = {
+    'alunos': ('nome', 'cpf', 'data_nascimento', 'endereco', 'cidade', 'estado', 'cep', 'telefone',
+               'email', 'data_matricula', 'status'),
+    'exercicios': ('nome', 'grupos', 'descricao'),
+    'treinos': ('aluno_cpf', 'nome', 'funcionario_email'),
+    'itens': ('aluno_cpf', 'treino', 'exercicio', 'series', 'repeticoes', 'descanso_seg', 'observacoes'),
+}
+FORMATOS_LOTE = ('csv', 'jsonl', 'json')
+
+def formato_do_arquivo(nome):
+    formato = os.path.splitext(nome)[1].lstrip('.').lower()
+    if formato not in FORMATOS_LOTE:
+        raise click.BadParameter(f"formato '{formato}' não suportado (use {', '.join(FORMATOS_LOTE)})")
+    return formato
+
+def ler_registros(arquivo, formato):
+    """Gera dicionários a partir de um arquivo aberto em modo texto, sem carregá-lo inteiro (exceto JSON)."""
+    if formato == 'csv':
+        yield from csv.DictReader(arquivo)
+    elif formato == 'jsonl':
+        for linha in arquivo:
+            if linha.strip():
+                yield json.loads(linha)
+    else:
+        yield from json.load(arquivo)
+
+def ler_campo(registro, nome, obrigatorio=False, tamanho=None):
+    valor = registro.get(nome)
+    valor = str(valor).strip() if valor is not None else ''
+    if not valor:
+        if obrigatorio:
+            raise ValueError(f"campo '{nome}' é obrigatório")
+        return None
+    if tamanho and len(valor) > tamanho:
+        raise ValueError(f"campo '{nome}' excede {tamanho} caracteres")
+    return valor
+
+def _data(registro, nome, obrigatorio=False):
+    bruto = ler_campo(registro, nome, obrigatorio)
+    valor = ler_data(bruto)
+    if bruto and valor is None:
+        raise ValueError(f"data inválida em '{nome}': {bruto}")
+    return valor
+
+class ImportacaoLote:
+    """Valida e grava os registros em lotes, um lote por transação.
+
+    A importação é parcial: um lote recusado pelo banco (ex.: email repetido gravado por outra
+    requisição nesse meio tempo) entra em 'erros' e 'lotes_rejeitados', e os demais continuam
+    gravados. Os hashes de senha rodam em threads (o hashlib libera o GIL); com 'em_processos',
+    usado pelo 'flask importar', em processos iniciados por spawn. Um fork dentro do worker web
+    herdaria os locks dos threads da fila de tarefas e dos check-ins.
+    """
+
+    def __init__(self, tipo, tamanho_lote=None, processos=None, em_processos=False):
+        self.tipo = tipo
+        self.tamanho_lote = tamanho_lote or current_app.config['IMPORTACAO_TAMANHO_LOTE']
+        self.processos = processos or current_app.config['IMPORTACAO_PROCESSOS']
+        self.em_processos = em_processos
+        self.inseridos = 0
+        self.erros = []
+        self.lotes_rejeitados = 0
+        self._pool = None
+
+    def executar(self, registros):
+        validar = getattr(self, f'_validar_{self.tipo}')
+        gravar = getattr(self, f'_gravar_{self.tipo}', self._gravar)
+        getattr(self, f'_carregar_{self.tipo}')()
+        lote = []
+        primeiro = None
+        try:
+            for numero, registro in enumerate(registros, start=1):
+                try:
+                    lote.append(validar(registro))
+                except (ValueError, TypeError, AttributeError) as erro:
+                    self.erros.append(f'registro {numero}: {erro}')
+                    continue
+                primeiro = primeiro or numero
+                if len(lote) >= self.tamanho_lote:
+                    self._gravar_lote(gravar, lote, primeiro, numero)
+                    lote, primeiro = [], None
+            if lote:
+                self._gravar_lote(gravar, lote, primeiro, numero)
+        finally:
+            if self._pool:
+                self._pool.shutdown()
+        # Inserções pelo Core não passam pelos eventos da sessão: a versão TUDO invalida os caches em todos os workers
+        with db.engine.begin() as conexao:
+            versoes_entidades.aplicar(versoes_entidades.invalidar_tudo(conexao))
+        return {'tipo': self.tipo, 'inseridos': self.inseridos, 'erros': self.erros,
+                'lotes_rejeitados': self.lotes_rejeitados}
+
+    def _gravar_lote(self, gravar, lote, primeiro, ultimo):
+        try:
+            gravar(lote)
+        except SQLAlchemyError as erro:
+            # Os valores únicos do lote desfeito voltam a ficar livres para as linhas seguintes
+            desfazer = getattr(self, f'_desfazer_{self.tipo}', None)
+            if desfazer:
+                desfazer(lote)
+            self.lotes_rejeitados += 1
+            self.erros.append(f'registros {primeiro} a {ultimo}: lote recusado pelo banco '
+                              f'({getattr(erro, "orig", None) or erro})')
+
+    def _gravar(self, lote, modelo=None):
+        modelo = modelo or {'alunos': Aluno, 'treinos': Treino, 'itens': ItemTreino}[self.tipo]
+        tabela = modelo.__table__
+        with db.engine.begin() as conexao:
+            ids = conexao.execute(
+                tabela.insert().returning(tabela.c.id, sort_by_parameter_order=True), lote
+            ).scalars().all()
+            if modelo in INDICES_BUSCA:
+                indexar_ids(conexao, modelo, ids)
+        self.inseridos += len(ids)
+        return ids
+
+    # Alunos: CPF e email únicos; a senha inicial é o CPF, como no cadastro pela tela
+    def _carregar_alunos(self):
+        self._cpfs = {cpf for (cpf,) in db.session.query(Aluno.cpf)}
+        self._emails = {email for (email,) in db.session.query(Aluno.email).filter(Aluno.email.isnot(None))}
+
+    def _validar_alunos(self, registro):
+        cpf = ler_campo(registro, 'cpf', True, 14)
+        email = ler_campo(registro, 'email', tamanho=100)
+        if cpf in self._cpfs:
+            raise ValueError(f'CPF {cpf} já cadastrado')
+        if email and email in self._emails:
+            raise ValueError(f'email {email} já cadastrado')
+        status = ler_campo(registro, 'status') or 'Ativo'
+        if status not in ('Ativo', 'Inativo'):
+            raise ValueError(f'status inválido: {status}')
+        nascimento = _data(registro, 'data_nascimento', True)
+        linha = {
+            'nome': ler_campo(registro, 'nome', True, 100),
+            'cpf': cpf,
+            'foto': FOTO_PADRAO,
+            'data_nascimento': nascimento,
+            'dia_aniversario': nascimento.month * 100 + nascimento.day,
+            'endereco': ler_campo(registro, 'endereco', tamanho=200),
+            'cidade': ler_campo(registro, 'cidade', tamanho=100),
+            'estado': ler_campo(registro, 'estado', tamanho=2),
+            'cep': ler_campo(registro, 'cep', tamanho=9),
+            'telefone': ler_campo(registro, 'telefone', tamanho=20),
+            'email': email,
+            'data_matricula': _data(registro, 'data_matricula'),
+            'status': status,
+            'senha_hash': ler_campo(registro, 'senha') or cpf,
+        }
+        # Só uma linha válida reserva o CPF e o email; uma inválida pode ser corrigida mais adiante no arquivo
+        self._cpfs.add(cpf)
+        if email:
+            self._emails.add(email)
+        return linha
+
+    def _desfazer_alunos(self, lote):
+        self._cpfs.difference_update(linha['cpf'] for linha in lote)
+        self._emails.difference_update(linha['email'] for linha in lote if linha['email'])
+
+    def _gravar_alunos(self, lote):
+        # O hash é a parte cara da importação; com lotes grandes ele roda em paralelo
+        senhas = [linha['senha_hash'] for linha in lote]
+        gerar_hash = functools.partial(generate_password_hash, method=current_app.config['SENHA_METODO_HASH'])
+        if len(senhas) >= current_app.config['IMPORTACAO_MINIMO_PARA_PROCESSOS']:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processos, mp_context=multiprocessing.get_context('spawn')
+                ) if self.em_processos else ThreadPoolExecutor(max_workers=self.processos or os.cpu_count())
+            hashes = self._pool.map(gerar_hash, senhas, chunksize=max(1, len(senhas) // (self.processos or 4) // 4))
+        else:
+            hashes = map(gerar_hash, senhas)
+        for linha, senha_hash in zip(lote, hashes):
+            linha['senha_hash'] = senha_hash
+        self._gravar(lote)
+
+    # Exercícios: nome único; grupos separados por ';' ou ','
+    def _carregar_exercicios(self):
+        self._exercicios = {nome for (nome,) in db.session.query(Exercicio.nome)}
+        self._grupos = dict(db.session.query(GrupoMuscular.nome, GrupoMuscular.id))
+
+    def _validar_exercicios(self, registro):
+        nome = ler_campo(registro, 'nome', True, 100)
+        if nome in self._exercicios:
+            raise ValueError(f'exercício {nome} já cadastrado')
+        grupos = registro.get('grupos') or []
+        if isinstance(grupos, str):
+            grupos = re.split(r'[;,]', grupos)
+        linha = {
+            'nome': nome,
+            'descricao': ler_campo(registro, 'descricao'),
+            'grupos': list(dict.fromkeys(g.strip() for g in grupos if g and g.strip())),
+        }
+        self._exercicios.add(nome)
+        return linha
+
+    def _desfazer_exercicios(self, lote):
+        self._exercicios.difference_update(linha['nome'] for linha in lote)
+
+    def _gravar_exercicios(self, lote):
+        grupos_por_linha = [linha.pop('grupos') for linha in lote]
+        novos = [g for g in dict.fromkeys(g for grupos in grupos_por_linha for g in grupos) if g not in self._grupos]
+        tabela = Exercicio.__table__
+        grupos = dict(self._grupos)
+        with db.engine.begin() as conexao:
+            if novos:
+                ids_grupos = conexao.execute(
+                    GrupoMuscular.__table__.insert().returning(GrupoMuscular.id, sort_by_parameter_order=True),
+                    [{'nome': nome} for nome in novos]
+                ).scalars().all()
+                grupos.update(zip(novos, ids_grupos))
+            ids = conexao.execute(
+                tabela.insert().returning(tabela.c.id, sort_by_parameter_order=True), lote
+            ).scalars().all()
+            associacoes = [{'exercicio_id': exercicio_id, 'grupo_id': grupos[g]}
+                           for exercicio_id, grupos_linha in zip(ids, grupos_por_linha) for g in grupos_linha]
+            if associacoes:
+                conexao.execute(exercicio_grupo.insert(), associacoes)
+            indexar_ids(conexao, Exercicio, ids)
+        # Só depois do commit: num lote recusado os grupos novos também são desfeitos
+        self._grupos = grupos
+        self.inseridos += len(ids)
+
+    # Fichas: o aluno é identificado pelo CPF e o professor (opcional) pelo email
+    def _carregar_treinos(self):
+        self._alunos = dict(db.session.query(Aluno.cpf, Aluno.id))
+        self._funcionarios = dict(db.session.query(Funcionario.email, Funcionario.id)
+                                  .filter(Funcionario.email.isnot(None)))
+
+    def _validar_treinos(self, registro):
+        cpf = ler_campo(registro, 'aluno_cpf', True)
+        if cpf not in self._alunos:
+            raise ValueError(f'aluno com CPF {cpf} não encontrado')
+        email = ler_campo(registro, 'funcionario_email')
+        if email and email not in self._funcionarios:
+            raise ValueError(f'funcionário {email} não encontrado')
+        return {
+            'nome': ler_campo(registro, 'nome', True, 100),
+            'aluno_id': self._alunos[cpf],
+            'funcionario_id': self._funcionarios.get(email),
+        }
+
+    # Itens: a ficha é identificada por (CPF do aluno, nome da ficha) e o exercício pelo nome
+    def _carregar_itens(self):
+        self._treinos = {
+            (cpf, nome): treino_id for cpf, nome, treino_id in
+            db.session.query(Aluno.cpf, Treino.nome, Treino.id).join(Treino.aluno).order_by(Treino.id)
+        }
+        self._exercicios = dict(db.session.query(Exercicio.nome, Exercicio.id))
+
+    def _validar_itens(self, registro):
+        chave = (ler_campo(registro, 'aluno_cpf', True), ler_campo(registro, 'treino', True))
+        if chave not in self._treinos:
+            raise ValueError(f"ficha '{chave[1]}' do aluno {chave[0]} não encontrada")
+        exercicio = ler_campo(registro, 'exercicio', True)
+        if exercicio not in self._exercicios:
+            raise ValueError(f'exercício {exercicio} não encontrado')
+        descanso = ler_campo(registro, 'descanso_seg')
+        return {
+            'treino_id': self._treinos[chave],
+            'exercicio_id': self._exercicios[exercicio],
+            'series': ler_campo(registro, 'series', tamanho=20),
+            'repeticoes': ler_campo(registro, 'repeticoes', tamanho=20),
+            'descanso_seg': int(descanso) if descanso else None,
+            'observacoes': ler_campo(registro, 'observacoes'),
+        }
+
+
+def registros_exportacao(tipo):
+    """Gera dicionários com os campos de CAMPOS_LOTE, lendo o banco em blocos."""
+    if tipo == 'alunos':
+        colunas = [getattr(Aluno, c) for c in CAMPOS_LOTE['alunos']]
+        consulta = db.session.query(*colunas).order_by(Aluno.id)
+    elif tipo == 'exercicios':
+        for exercicio in Exercicio.query.options(selectinload(Exercicio.grupos)).order_by(Exercicio.id).yield_per(1000):
+            yield {'nome': exercicio.nome, 'grupos': ';'.join(g.nome for g in exercicio.grupos),
+                   'descricao': exercicio.descricao}
+        return
+    elif tipo == 'treinos':
+        consulta = db.session.query(Aluno.cpf, Treino.nome, Funcionario.email) \
+            .join(Treino.aluno).outerjoin(Treino.funcionario).order_by(Treino.id)
+    else:
+        consulta = db.session.query(
+            Aluno.cpf, Treino.nome, Exercicio.nome, ItemTreino.series, ItemTreino.repeticoes,
+            ItemTreino.descanso_seg, ItemTreino.observacoes
+        ).select_from(ItemTreino).join(ItemTreino.treino).join(Treino.aluno).join(ItemTreino.exercicio) \
+            .order_by(ItemTreino.id)
+    for linha in consulta.yield_per(1000):
+        yield dict(zip(CAMPOS_LOTE[tipo], linha))
+
+def serializar_exportacao(tipo, formato, linhas_por_bloco=500):
+    """Gera o arquivo em pedaços de texto, para ser enviado enquanto é produzido."""
+    buffer = io.StringIO()
+    escritor = None
+    if formato == 'csv':
+        escritor = csv.DictWriter(buffer, fieldnames=CAMPOS_LOTE[tipo])
+        escritor.writeheader()
+    elif formato == 'json':
+        buffer.write('[')
+    for numero, registro in enumerate(registros_exportacao(tipo)):
+        registro = {k: v.isoformat() if isinstance(v, date) else v for k, v in registro.items()}
+        if escritor:
+            escritor.writerow(registro)
+        else:
+            if formato == 'json' and numero:
+                buffer.write(',')
+            buffer.write(json.dumps(registro, ensure_ascii=False))
+            if formato == 'jsonl':
+                buffer.write('\n')
+        if numero % linhas_por_bloco == linhas_por_bloco - 1:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if formato == 'json':
+        buffer.write(']')
+    yield buffer.getvalue()
@@ -0,0 +1,176 @@
+import time
+import threading
+import bisect
+import contextvars
+from collections import Counter
+
+from werkzeug.wsgi import ClosingIterator
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .extensoes import estado_da_aplicacao
+from .versoes import cache_fragmentos
+
+# --- Métricas de requisições (latência, SQL, templates e uploads) em formato Prometheus ---
+# Um middleware WSGI abre uma Medicao por requisição; os eventos do SQLAlchemy e os sinais de
+# renderização do Flask somam nela via ContextVar. Ao fechar a resposta (inclusive as em streaming)
+# a medição é agregada por endpoint e exposta em /metrics.
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histograma:
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+
+    def linhas(self, nome, rotulos):
+        acumulado = 0
+        for limite, contagem in zip(self.limites + ('+Inf',), self.contagens):
+            acumulado += contagem
+            yield f'{nome}_bucket{{{rotulos},le="{limite}"}} {acumulado}'
+        yield f'{nome}_sum{{{rotulos}}} {self.soma:.6f}'
+        yield f'{nome}_count{{{rotulos}}} {acumulado}'
+
+class Medicao:
+    __slots__ = ('inicio', 'endpoint', 'metodo', 'status', 'upload_bytes', 'consultas', 'sql_segundos', 'sql',
+                 'renderizacoes')
+
+    def __init__(self, environ, guardar_sql):
+        self.inicio = time.perf_counter()
+        self.endpoint = None
+        self.metodo = environ.get('REQUEST_METHOD', '')
+        self.status = '500'
+        tipo = environ.get('CONTENT_TYPE', '')
+        self.upload_bytes = int(environ.get('CONTENT_LENGTH') or 0) if tipo.startswith('multipart/form-data') else 0
+        self.consultas = 0
+        self.sql_segundos = 0.0
+        self.sql = [] if guardar_sql else None
+        self.renderizacoes = []
+
+class MetricasRequisicoes:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.duracoes = {}
+        self.requisicoes = Counter()
+        self.sql_consultas = Counter()
+        self.sql_segundos = Counter()
+        self.upload_bytes = Counter()
+        self.templates = {}
+
+    def registrar(self, medicao, duracao):
+        endpoint = medicao.endpoint or 'nenhum'
+        with self._lock:
+            self.duracoes.setdefault((endpoint, medicao.metodo), Histograma()).observar(duracao)
+            self.requisicoes[(endpoint, medicao.metodo, medicao.status)] += 1
+            self.sql_consultas[endpoint] += medicao.consultas
+            self.sql_segundos[endpoint] += medicao.sql_segundos
+            if medicao.upload_bytes:
+                self.upload_bytes[endpoint] += medicao.upload_bytes
+            for nome, segundos in medicao.renderizacoes:
+                self.templates.setdefault(nome, Histograma()).observar(segundos)
+
+    def exportar(self):
+        def contador(nome, ajuda, valores, rotulo):
+            yield f'# HELP {nome} {ajuda}'
+            yield f'# TYPE {nome} counter'
+            for chave, valor in sorted(valores.items()):
+                yield f'{nome}{{{rotulo}="{chave}"}} {valor:.6f}' if isinstance(valor, float) else \
+                    f'{nome}{{{rotulo}="{chave}"}} {valor}'
+
+        with self._lock:
+            linhas = ['# HELP academia_requisicao_segundos Duração das requisições por endpoint.',
+                      '# TYPE academia_requisicao_segundos histogram']
+            for (endpoint, metodo), histograma in sorted(self.duracoes.items()):
+                linhas.extend(histograma.linhas('academia_requisicao_segundos',
+                                                f'endpoint="{endpoint}",metodo="{metodo}"'))
+            linhas += ['# HELP academia_requisicoes_total Requisições atendidas por endpoint e status.',
+                       '# TYPE academia_requisicoes_total counter']
+            for (endpoint, metodo, status), total in sorted(self.requisicoes.items()):
+                linhas.append(f'academia_requisicoes_total{{endpoint="{endpoint}",metodo="{metodo}",'
+                              f'status="{status}"}} {total}')
+            linhas.extend(contador('academia_sql_consultas_total', 'Comandos SQL executados por endpoint.',
+                                   self.sql_consultas, 'endpoint'))
+            linhas.extend(contador('academia_sql_segundos_total', 'Tempo gasto em SQL por endpoint.',
+                                   self.sql_segundos, 'endpoint'))
+            linhas.extend(contador('academia_upload_bytes_total', 'Bytes recebidos em formulários multipart.',
+                                   self.upload_bytes, 'endpoint'))
+            linhas += ['# HELP academia_template_segundos Tempo de renderização por template.',
+                       '# TYPE academia_template_segundos histogram']
+            for nome, histograma in sorted(self.templates.items()):
+                linhas.extend(histograma.linhas('academia_template_segundos', f'template="{nome}"'))
+        fragmentos = cache_fragmentos.metricas()
+        linhas += ['# HELP academia_fragmentos_total Consultas ao cache de fragmentos por resultado.',
+                   '# TYPE academia_fragmentos_total counter',
+                   f'academia_fragmentos_total{{resultado="acerto"}} {fragmentos["acertos"]}',
+                   f'academia_fragmentos_total{{resultado="falha"}} {fragmentos["falhas"]}']
+        return '\n'.join(linhas) + '\n'
+
+metricas_requisicoes = estado_da_aplicacao('metricas_requisicoes')
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+class InstrumentacaoWSGI:
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+
+    def __call__(self, environ, start_response):
+        medicao = Medicao(environ, guardar_sql=self.app.config['METRICAS_LENTAS_MS'] is not None)
+        _medicao_atual.set(medicao)
+
+        def iniciar_resposta(status, cabecalhos, exc_info=None):
+            medicao.status = status.split(' ', 1)[0]
+            return start_response(status, cabecalhos, exc_info)
+
+        try:
+            resposta = self.wsgi_app(environ, iniciar_resposta)
+        except Exception:
+            self._finalizar(medicao)
+            raise
+        return ClosingIterator(resposta, lambda: self._finalizar(medicao))
+
+    def _finalizar(self, medicao):
+        _medicao_atual.set(None)
+        duracao = time.perf_counter() - medicao.inicio
+        # Ao fechar a resposta o contexto da aplicação já terminou: o estado vem direto da aplicação
+        self.app.extensions['academia'].metricas_requisicoes.registrar(medicao, duracao)
+        limite = self.app.config['METRICAS_LENTAS_MS']
+        if limite is not None and duracao * 1000 >= limite:
+            piores = sorted(medicao.sql, reverse=True)[:5]
+            self.app.logger.warning(
+                'Requisição lenta: %s %s %.0f ms, %d consulta(s) SQL em %.0f ms%s',
+                medicao.metodo, medicao.endpoint or 'nenhum', duracao * 1000, medicao.consultas, medicao.sql_segundos * 1000,
+                ''.join(f'\n  {segundos * 1000:.1f} ms: {comando}' for segundos, comando in piores))
+
+def registrar_endpoint_medido():
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        medicao.endpoint = request.endpoint
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def iniciar_cronometro_sql(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def medir_consulta_sql(conn, cursor, statement, parameters, context, executemany):
+    segundos = time.perf_counter() - conn.info['inicio_consultas'].pop()
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        medicao.consultas += 1
+        medicao.sql_segundos += segundos
+        if medicao.sql is not None and len(medicao.sql) < 200:
+            medicao.sql.append((segundos, ' '.join(statement.split())[:300]))
+
+def iniciar_cronometro_template(sender, template, context, **extra):
+    g.setdefault('inicio_templates', []).append(time.perf_counter())
+
+def medir_template(sender, template, context, **extra):
+    medicao = _medicao_atual.get()
+    inicio = g.inicio_templates.pop()
+    if medicao is not None:
+        medicao.renderizacoes.append((template.name, time.perf_counter() - inicio))
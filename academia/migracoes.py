@@ -0,0 +1,119 @@
+import click
+from datetime import datetime
+
+from sqlalchemy import MetaData, inspect, select, text
+
+from .extensoes import db
+from .modelos import Aluno, Exercicio, Funcionario, GrupoMuscular, ItemTreino, Treino, exercicio_grupo
+from .datas import ler_data
+from .busca import criar_indices_busca
+
+# --- Migrações de esquema ---
+# Bancos novos são criados já na versão final pelo db.create_all(); as funções abaixo
+# só rodam em bancos criados por versões anteriores do sistema.
+
+versao_schema = db.Table(
+    'versao_schema',
+    db.Column('versao', db.Integer, primary_key=True),
+    db.Column('descricao', db.String(100), nullable=False),
+    db.Column('aplicada_em', db.DateTime, nullable=False),
+)
+
+def reconstruir_tabela_sqlite(conexao, tabela, converter=None, tamanho_lote=1000):
+    """Recria a tabela com o esquema atual do modelo (SQLite não suporta ALTER COLUMN)."""
+    colunas_antigas = {c['name'] for c in inspect(conexao).get_columns(tabela.name)}
+    colunas = [c.name for c in tabela.columns if c.name in colunas_antigas]
+    nova = tabela.to_metadata(MetaData(), name=tabela.name + '_nova')
+    nova.indexes.clear()  # criados depois do RENAME para manterem o nome definitivo
+    nova.create(conexao)
+
+    linhas = conexao.execute(text(f"SELECT {', '.join(colunas)} FROM {tabela.name}")).mappings()
+    while True:
+        lote = [dict(linha) for linha in linhas.fetchmany(tamanho_lote)]
+        if not lote:
+            break
+        if converter:
+            lote = [converter(linha) for linha in lote]
+        conexao.execute(nova.insert(), lote)
+
+    conexao.execute(text(f"DROP TABLE {tabela.name}"))
+    conexao.execute(text(f"ALTER TABLE {nova.name} RENAME TO {tabela.name}"))
+    for indice in tabela.indexes:
+        indice.create(conexao)
+
+def _converter_datas(*colunas, obrigatorias=()):
+    def converter(linha):
+        for coluna in colunas:
+            bruto = linha.get(coluna)
+            linha[coluna] = ler_data(bruto)
+            if linha[coluna] is None and coluna in obrigatorias:
+                raise click.ClickException(
+                    f"Registro {linha['id']}: valor inválido em {coluna} ({bruto!r}). Corrija antes de migrar.")
+        if 'data_nascimento' in colunas:
+            nascimento = linha['data_nascimento']
+            linha['dia_aniversario'] = nascimento.month * 100 + nascimento.day if nascimento else None
+        return linha
+    return converter
+
+def migracao_indices_e_datas(conexao):
+    if conexao.dialect.name != 'sqlite':
+        raise click.ClickException('Bancos antigos só existiam em SQLite; esta migração não se aplica.')
+    reconstruir_tabela_sqlite(conexao, Aluno.__table__, _converter_datas(
+        'data_nascimento', 'data_matricula', obrigatorias=('data_nascimento',)))
+    reconstruir_tabela_sqlite(conexao, Funcionario.__table__, _converter_datas('data_admissao'))
+    for tabela in (Treino.__table__, ItemTreino.__table__):
+        for indice in tabela.indexes:
+            indice.create(conexao, checkfirst=True)
+
+def migracao_grupos_musculares(conexao):
+    # O db.create_all() do migrar() já criou grupos_musculares e exercicio_grupo
+    grupos = {}
+    associacoes = []
+    for exercicio_id, texto in conexao.execute(text("SELECT id, grupo_muscular FROM exercicios")):
+        for nome in dict.fromkeys(n.strip() for n in (texto or '').split(',') if n.strip()):
+            if nome not in grupos:
+                grupos[nome] = conexao.execute(
+                    GrupoMuscular.__table__.insert().values(nome=nome)).inserted_primary_key[0]
+            associacoes.append({'exercicio_id': exercicio_id, 'grupo_id': grupos[nome]})
+    if associacoes:
+        conexao.execute(exercicio_grupo.insert(), associacoes)
+    reconstruir_tabela_sqlite(conexao, Exercicio.__table__)
+
+def migracao_cartao_aluno(conexao):
+    # Bancos que passaram pela migração 1 agora já têm a coluna (a tabela foi recriada com o modelo atual)
+    if 'cartao' not in {c['name'] for c in inspect(conexao).get_columns('alunos')}:
+        conexao.execute(text("ALTER TABLE alunos ADD COLUMN cartao VARCHAR(32)"))
+    for indice in Aluno.__table__.indexes:
+        if 'cartao' in indice.columns:
+            indice.create(conexao, checkfirst=True)
+
+def migracao_indices_nome(conexao):
+    for tabela, nome in ((Aluno.__table__, 'ix_alunos_nome_id'), (Funcionario.__table__, 'ix_funcionarios_nome_id')):
+        for indice in tabela.indexes:
+            if indice.name == nome:
+                indice.create(conexao, checkfirst=True)
+
+MIGRACOES = [
+    (1, 'índices e colunas de data', migracao_indices_e_datas),
+    (2, 'grupos musculares normalizados', migracao_grupos_musculares),
+    (3, 'cartão de acesso do aluno', migracao_cartao_aluno),
+    (4, 'índices (nome, id) para paginação', migracao_indices_nome),
+]
+
+def migrar():
+    """Cria tabelas novas e aplica as migrações pendentes, uma transação por migração."""
+    banco_existente = inspect(db.engine).has_table(Aluno.__tablename__)
+    db.create_all()
+    with db.engine.connect() as conexao:
+        aplicadas = {v for (v,) in conexao.execute(select(versao_schema.c.versao))}
+    for versao, descricao, funcao in MIGRACOES:
+        if versao in aplicadas:
+            continue
+        with db.engine.begin() as conexao:
+            if banco_existente:
+                funcao(conexao)
+                click.echo(f'Migração {versao} aplicada: {descricao}')
+            conexao.execute(versao_schema.insert().values(
+                versao=versao, descricao=descricao, aplicada_em=datetime.now()))
+    with db.engine.begin() as conexao:
+        criar_indices_busca(conexao)
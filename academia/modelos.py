@@ -0,0 +1,192 @@
+import functools
+
+from werkzeug.security import check_password_hash, generate_password_hash
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy.orm import validates
+
+from .extensoes import db
+
+@functools.lru_cache(maxsize=8)
+def prefixo_metodo_hash(metodo):
+    """Prefixo que o werkzeug grava para 'metodo', com os padrões preenchidos ('pbkdf2' -> 'pbkdf2:sha256:N')."""
+    return generate_password_hash('', method=metodo).split('$', 1)[0]
+
+
+class Aluno(db.Model, UserMixin):
+    __tablename__ = 'alunos'
+    # Listagens paginadas por (nome, id) percorrem o índice em vez de ordenar a tabela
+    __table_args__ = (db.Index('ix_alunos_nome_id', 'nome', 'id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), nullable=False)
+    foto = db.Column(db.String(100), nullable=True, default='default.png')
+    cpf = db.Column(db.String(14), unique=True, nullable=False)
+    senha_hash = db.Column(db.String(200), nullable=True)
+    data_nascimento = db.Column(db.Date, nullable=False)
+    endereco = db.Column(db.String(200), nullable=True)
+    cidade = db.Column(db.String(100), nullable=True)
+    estado = db.Column(db.String(2), nullable=True)
+    cep = db.Column(db.String(9), nullable=True)
+    telefone = db.Column(db.String(20), nullable=True)
+    email = db.Column(db.String(100), unique=True, nullable=True)
+    data_matricula = db.Column(db.Date, nullable=True, index=True)
+    status = db.Column(db.String(10), default='Ativo', nullable=False, index=True)
+    # MMDD do nascimento, indexado para buscar aniversariantes sem varrer a tabela
+    dia_aniversario = db.Column(db.Integer, nullable=True, index=True)
+    # Código do cartão lido na recepção (check-in)
+    cartao = db.Column(db.String(32), unique=True, nullable=True, index=True)
+
+    treinos = db.relationship('Treino', back_populates='aluno', lazy=True, cascade="all, delete-orphan")
+
+    @validates('data_nascimento')
+    def atualizar_dia_aniversario(self, chave, valor):
+        self.dia_aniversario = valor.month * 100 + valor.day if valor else None
+        return valor
+
+    def get_id(self):
+        return f"aluno_{self.id}"
+    
+    @property
+    def tipo_usuario(self):
+        return 'Aluno'
+
+    def set_senha(self, senha):
+        self.senha_hash = generate_password_hash(senha, method=current_app.config['SENHA_METODO_HASH'])
+
+    def check_senha(self, senha):
+        return bool(self.senha_hash) and check_password_hash(self.senha_hash, senha)
+
+    def senha_precisa_atualizar(self):
+        return not self.senha_hash.startswith(prefixo_metodo_hash(current_app.config['SENHA_METODO_HASH']) + '$')
+
+class Funcionario(db.Model, UserMixin):
+    __tablename__ = 'funcionarios'
+    __table_args__ = (db.Index('ix_funcionarios_nome_id', 'nome', 'id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), nullable=False)
+    foto = db.Column(db.String(100), nullable=True, default='default.png')
+    senha_hash = db.Column(db.String(200), nullable=True)
+    cargo = db.Column(db.String(50), nullable=False)
+    cref = db.Column(db.String(20), unique=True, nullable=True)
+    endereco = db.Column(db.String(200), nullable=True)
+    cidade = db.Column(db.String(100), nullable=True)
+    estado = db.Column(db.String(2), nullable=True)
+    cep = db.Column(db.String(9), nullable=True)
+    telefone = db.Column(db.String(20), nullable=True)
+    email = db.Column(db.String(100), unique=True, nullable=True)
+    data_admissao = db.Column(db.Date, nullable=True, index=True)
+    
+    treinos = db.relationship('Treino', back_populates='funcionario', lazy=True)
+
+    def get_id(self):
+        return f"func_{self.id}"
+
+    @property
+    def tipo_usuario(self):
+        return 'Funcionario'
+
+    def set_senha(self, senha):
+        self.senha_hash = generate_password_hash(senha, method=current_app.config['SENHA_METODO_HASH'])
+
+    def check_senha(self, senha):
+        return bool(self.senha_hash) and check_password_hash(self.senha_hash, senha)
+
+    def senha_precisa_atualizar(self):
+        return not self.senha_hash.startswith(prefixo_metodo_hash(current_app.config['SENHA_METODO_HASH']) + '$')
+
+exercicio_grupo = db.Table(
+    'exercicio_grupo',
+    db.Column('exercicio_id', db.Integer, db.ForeignKey('exercicios.id'), primary_key=True),
+    db.Column('grupo_id', db.Integer, db.ForeignKey('grupos_musculares.id'), primary_key=True, index=True),
+)
+
+class GrupoMuscular(db.Model):
+    __tablename__ = 'grupos_musculares'
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(50), nullable=False, unique=True)
+    exercicios = db.relationship('Exercicio', secondary=exercicio_grupo, back_populates='grupos')
+
+class Exercicio(db.Model):
+    __tablename__ = 'exercicios'
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), nullable=False, unique=True)
+    descricao = db.Column(db.Text, nullable=True)
+    itens_treino = db.relationship('ItemTreino', back_populates='exercicio', lazy=True)
+    # Carregados com selectinload só nas consultas que mostram os grupos
+    grupos = db.relationship('GrupoMuscular', secondary=exercicio_grupo, back_populates='exercicios',
+                             lazy=True, order_by='GrupoMuscular.nome')
+
+class Treino(db.Model):
+    __tablename__ = 'treinos'
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), nullable=False)
+    aluno_id = db.Column(db.Integer, db.ForeignKey('alunos.id'), nullable=False, index=True)
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=True, index=True)
+    aluno = db.relationship('Aluno', back_populates='treinos')
+    funcionario = db.relationship('Funcionario', back_populates='treinos')
+    itens = db.relationship('ItemTreino', back_populates='treino', lazy=True, cascade="all, delete-orphan")
+
+class ItemTreino(db.Model):
+    __tablename__ = 'itens_treino'
+    id = db.Column(db.Integer, primary_key=True)
+    treino_id = db.Column(db.Integer, db.ForeignKey('treinos.id'), nullable=False, index=True)
+    exercicio_id = db.Column(db.Integer, db.ForeignKey('exercicios.id'), nullable=False, index=True)
+    series = db.Column(db.String(20), nullable=True)
+    repeticoes = db.Column(db.String(20), nullable=True)
+    descanso_seg = db.Column(db.Integer, nullable=True)
+    observacoes = db.Column(db.Text, nullable=True)
+    treino = db.relationship('Treino', back_populates='itens')
+    exercicio = db.relationship('Exercicio', back_populates='itens_treino')
+
+class ModeloTreino(db.Model):
+    __tablename__ = 'modelos_treino'
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), nullable=False)
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=True, index=True)
+    funcionario = db.relationship('Funcionario')
+    itens = db.relationship('ItemModeloTreino', back_populates='modelo', lazy=True, cascade="all, delete-orphan",
+                            order_by='ItemModeloTreino.id')
+
+class ItemModeloTreino(db.Model):
+    __tablename__ = 'itens_modelo_treino'
+    id = db.Column(db.Integer, primary_key=True)
+    modelo_id = db.Column(db.Integer, db.ForeignKey('modelos_treino.id'), nullable=False, index=True)
+    exercicio_id = db.Column(db.Integer, db.ForeignKey('exercicios.id'), nullable=False, index=True)
+    series = db.Column(db.String(20), nullable=True)
+    repeticoes = db.Column(db.String(20), nullable=True)
+    descanso_seg = db.Column(db.Integer, nullable=True)
+    observacoes = db.Column(db.Text, nullable=True)
+    modelo = db.relationship('ModeloTreino', back_populates='itens')
+    exercicio = db.relationship('Exercicio')
+
+class Frequencia(db.Model):
+    """Check-ins na recepção. Só recebe inserções (em lote, ver BufferFrequencia)."""
+    __tablename__ = 'frequencias'
+    id = db.Column(db.Integer, primary_key=True)
+    aluno_id = db.Column(db.Integer, db.ForeignKey('alunos.id'), nullable=False, index=True)
+    registrada_em = db.Column(db.DateTime, nullable=False, index=True)
+    origem = db.Column(db.String(10), nullable=False)  # cpf ou cartao
+
+class OcupacaoHora(db.Model):
+    """Check-ins por dia e hora, somados a cada lote gravado; o dashboard lê só esta tabela."""
+    __tablename__ = 'ocupacao_horas'
+    dia = db.Column(db.Date, primary_key=True)
+    hora = db.Column(db.Integer, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+class Tarefa(db.Model):
+    __tablename__ = 'tarefas'
+    # Consulta do worker: estado = 'pendente' AND executar_apos <= agora ORDER BY executar_apos
+    __table_args__ = (db.Index('ix_tarefas_estado_executar_apos', 'estado', 'executar_apos'),)
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    argumentos = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    estado = db.Column(db.String(10), nullable=False, default='pendente')  # pendente, executando, concluida, falhou
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    max_tentativas = db.Column(db.Integer, nullable=False, default=3)
+    executar_apos = db.Column(db.DateTime, nullable=False)
+    criada_em = db.Column(db.DateTime, nullable=False)
+    iniciada_em = db.Column(db.DateTime, nullable=True)
+    concluida_em = db.Column(db.DateTime, nullable=True)
+    worker = db.Column(db.String(100), nullable=True)
+    erro = db.Column(db.Text, nullable=True)
@@ -0,0 +1,111 @@
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import func, literal, select
+
+from .extensoes import db
+from .modelos import Aluno, Exercicio, ItemModeloTreino, ItemTreino, ModeloTreino, Treino
+from .lote import ler_campo
+
+# --- Modelos de ficha: itens em lote e cópia de um modelo para vários alunos ---
+# A cópia é feita com INSERT ... SELECT no banco (fichas e itens), tudo numa única transação.
+
+COLUNAS_ITEM = ('exercicio_id', 'series', 'repeticoes', 'descanso_seg', 'observacoes')
+
+def ler_itens(dados):
+    """Valida a lista de itens recebida em JSON e devolve dicionários prontos para gravar."""
+    if not isinstance(dados, list) or not dados:
+        raise ValueError('informe uma lista de itens')
+    itens = []
+    for numero, item in enumerate(dados, start=1):
+        try:
+            descanso = item.get('descanso_seg')
+            itens.append({
+                'exercicio_id': int(ler_campo(item, 'exercicio_id', True)),
+                'series': ler_campo(item, 'series', tamanho=20),
+                'repeticoes': ler_campo(item, 'repeticoes', tamanho=20),
+                'descanso_seg': int(descanso) if descanso not in (None, '') else None,
+                'observacoes': ler_campo(item, 'observacoes'),
+            })
+        except (ValueError, TypeError, AttributeError) as erro:
+            raise ValueError(f'item {numero}: {erro}')
+    ids = {item['exercicio_id'] for item in itens}
+    faltando = ids - set(db.session.scalars(select(Exercicio.id).where(Exercicio.id.in_(ids))))
+    if faltando:
+        raise ValueError(f'exercício(s) não encontrado(s): {sorted(faltando)}')
+    return itens
+
+def dividir_em_lotes(valores, tamanho):
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+def ids_de_alunos(aluno_ids=(), cpfs=()):
+    """Converte ids e/ou CPFs em ids de alunos existentes, sem repetição e na ordem recebida."""
+    encontrados = []
+    tamanho = current_app.config['ATRIBUICAO_TAMANHO_LOTE']
+    aluno_ids = list(dict.fromkeys(int(aluno_id) for aluno_id in aluno_ids))
+    for lote in dividir_em_lotes(aluno_ids, tamanho):
+        existentes = set(db.session.scalars(select(Aluno.id).where(Aluno.id.in_(lote))))
+        encontrados.extend(aluno_id for aluno_id in lote if aluno_id in existentes)
+    cpfs = list(dict.fromkeys(cpf.strip() for cpf in cpfs if cpf.strip()))
+    for lote in dividir_em_lotes(cpfs, tamanho):
+        por_cpf = dict(db.session.execute(select(Aluno.cpf, Aluno.id).where(Aluno.cpf.in_(lote))).all())
+        encontrados.extend(por_cpf[cpf] for cpf in lote if cpf in por_cpf)
+    return list(dict.fromkeys(encontrados))
+
+def criar_modelo_de_treino(treino, nome, funcionario_id):
+    modelo = ModeloTreino(nome=nome, funcionario_id=funcionario_id)
+    db.session.add(modelo)
+    db.session.flush()
+    origem = ItemTreino.__table__
+    db.session.execute(ItemModeloTreino.__table__.insert().from_select(
+        ('modelo_id',) + COLUNAS_ITEM,
+        select(literal(modelo.id), *(origem.c[coluna] for coluna in COLUNAS_ITEM))
+        .where(origem.c.treino_id == treino.id).order_by(origem.c.id)
+    ))
+    db.session.commit()
+    return modelo
+
+def atribuir_modelo(modelo, aluno_ids, funcionario_id, nome=None):
+    """Cria, para cada aluno, uma ficha com os itens do modelo. Devolve o número de fichas criadas."""
+    treinos, itens = Treino.__table__, ItemTreino.__table__
+    itens_modelo = ItemModeloTreino.__table__
+    por_exercicio = Counter(dict(db.session.execute(
+        select(itens_modelo.c.exercicio_id, func.count())
+        .where(itens_modelo.c.modelo_id == modelo.id).group_by(itens_modelo.c.exercicio_id)
+    ).all()))
+    criadas = 0
+    deltas_fichas = Counter()
+    try:
+        for lote in dividir_em_lotes(aluno_ids, current_app.config['ATRIBUICAO_TAMANHO_LOTE']):
+            novos = db.session.execute(treinos.insert().from_select(
+                ('nome', 'aluno_id', 'funcionario_id'),
+                select(literal(nome or modelo.nome), Aluno.id, literal(funcionario_id, db.Integer))
+                .where(Aluno.id.in_(lote))
+            ).returning(treinos.c.id, treinos.c.aluno_id)).all()
+            if not novos:
+                continue
+            db.session.execute(itens.insert().from_select(
+                ('treino_id',) + COLUNAS_ITEM,
+                select(treinos.c.id, *(itens_modelo.c[coluna] for coluna in COLUNAS_ITEM))
+                .select_from(treinos.join(itens_modelo, itens_modelo.c.modelo_id == modelo.id))
+                .where(treinos.c.id.in_([treino_id for treino_id, _ in novos]))
+                .order_by(treinos.c.id, itens_modelo.c.id)
+            ))
+            criadas += len(novos)
+            versoes = db.session.info.setdefault('versoes_alteradas', set())
+            versoes.update(('fichas', aluno_id) for _, aluno_id in novos)
+            versoes.add(('Treino', None))
+            if funcionario_id:
+                deltas_fichas.update((funcionario_id, aluno_id) for _, aluno_id in novos)
+        # Inserções pelo Core não passam pelo after_flush: os deltas do dashboard vão direto para a sessão
+        if criadas:
+            db.session.info['dashboard_alterado'] = True
+            db.session.info.setdefault('dashboard_deltas_fichas', Counter()).update(deltas_fichas)
+            db.session.info.setdefault('dashboard_deltas_itens', Counter()).update(
+                {exercicio_id: total * criadas for exercicio_id, total in por_exercicio.items()})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return criadas
@@ -0,0 +1,73 @@
+import json
+import base64
+
+from flask import current_app, jsonify, request
+from sqlalchemy import tuple_
+
+# --- Paginação por cursor (keyset) ordenada por nome, desempate por id ---
+
+def codificar_cursor(nome, id_):
+    dados = json.dumps([nome, id_]).encode('utf-8')
+    return base64.urlsafe_b64encode(dados).decode('ascii')
+
+def decodificar_cursor(cursor):
+    try:
+        nome, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(nome), int(id_)
+    except (ValueError, TypeError):
+        return None
+
+def ler_tamanho_pagina():
+    por_pagina = request.args.get('por_pagina', current_app.config['ITENS_POR_PAGINA'], type=int)
+    return max(1, min(por_pagina, current_app.config['MAX_ITENS_POR_PAGINA']))
+
+def paginar_por_nome(query, modelo):
+    """Retorna (itens, proximo_cursor) usando os parâmetros 'apos' e 'por_pagina' da URL."""
+    por_pagina = ler_tamanho_pagina()
+    cursor = request.args.get('apos')
+    posicao = decodificar_cursor(cursor) if cursor else None
+    if posicao:
+        nome, id_ = posicao
+        # Comparação de tupla: o SQLite posiciona direto no índice (nome, id) em vez de filtrar a varredura
+        query = query.filter(tuple_(modelo.nome, modelo.id) > tuple_(nome, id_))
+
+    # Busca um registro a mais só para saber se existe próxima página
+    itens = query.order_by(modelo.nome, modelo.id).limit(por_pagina + 1).all()
+    proximo_cursor = None
+    if len(itens) > por_pagina:
+        itens = itens[:por_pagina]
+        proximo_cursor = codificar_cursor(itens[-1].nome, itens[-1].id)
+    return itens, proximo_cursor
+
+def aluno_para_dict(aluno):
+    return {
+        'id': aluno.id,
+        'nome': aluno.nome,
+        'cpf': aluno.cpf,
+        'email': aluno.email,
+        'status': aluno.status,
+        'foto': aluno.foto,
+    }
+
+def funcionario_para_dict(funcionario):
+    return {
+        'id': funcionario.id,
+        'nome': funcionario.nome,
+        'cargo': funcionario.cargo,
+        'email': funcionario.email,
+        'foto': funcionario.foto,
+    }
+
+def exercicio_para_dict(exercicio):
+    return {
+        'id': exercicio.id,
+        'nome': exercicio.nome,
+        'grupo_muscular': [grupo.nome for grupo in exercicio.grupos],
+        'descricao': exercicio.descricao,
+    }
+
+def resposta_paginada(itens, proximo_cursor, serializar):
+    return jsonify({
+        'itens': [serializar(item) for item in itens],
+        'proximo': proximo_cursor,
+    })
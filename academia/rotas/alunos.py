@@ -0,0 +1,165 @@
+from flask import Blueprint, abort, flash, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+
+from ..extensoes import db
+from ..modelos import Aluno
+from ..datas import ler_data
+from ..busca import filtro_busca
+from ..versoes import resposta_condicional
+from ..usuarios import definir_senha_inicial
+from ..fotos import FOTO_PADRAO, agendar_remocao_foto, foto_enviada
+from ..paginacao import aluno_para_dict, paginar_por_nome, resposta_paginada
+from ..frequencia import ocupacao_em_cache, registrar_checkin
+
+bp_alunos = Blueprint('alunos', __name__)
+
+def consulta_alunos(search):
+    query = Aluno.query
+    if search:
+        query = query.filter(filtro_busca(Aluno, search))
+    return query
+
+@bp_alunos.route('/alunos')
+@login_required
+def lista_alunos():
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    
+    alunos, proximo_cursor = paginar_por_nome(consulta_alunos(request.args.get('q')), Aluno)
+    return render_template('lista_alunos.html', alunos=alunos, proximo_cursor=proximo_cursor)
+
+@bp_alunos.route('/api/alunos')
+@login_required
+def api_alunos():
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    alunos, proximo_cursor = paginar_por_nome(consulta_alunos(request.args.get('q')), Aluno)
+    return resposta_paginada(alunos, proximo_cursor, aluno_para_dict)
+
+@bp_alunos.route('/aluno/perfil/<int:aluno_id>')
+@login_required
+def perfil_aluno(aluno_id):
+    if current_user.tipo_usuario == 'Aluno' and current_user.id != aluno_id:
+        return redirect(url_for('principal.index'))
+    return resposta_condicional([('Aluno', aluno_id)], lambda: render_template(
+        'perfil_aluno.html', aluno=Aluno.query.get_or_404(aluno_id)))
+
+@bp_alunos.route('/aluno/novo', methods=['GET', 'POST'])
+def novo_aluno():
+    if request.method == 'POST':
+        if ler_data(request.form['data_nascimento']) is None:
+            flash('Data de nascimento inválida.', 'danger')
+            return render_template('form_aluno.html', aluno=None)
+        foto_filename = foto_enviada() or FOTO_PADRAO
+
+        novo_aluno = Aluno(
+            foto=foto_filename,
+            nome=request.form['nome'],
+            cpf=request.form['cpf'],
+            data_nascimento=ler_data(request.form['data_nascimento']),
+            endereco=request.form.get('endereco'),
+            cidade=request.form.get('cidade'),
+            estado=request.form.get('estado'),
+            cep=request.form.get('cep'),
+            telefone=request.form.get('telefone'),
+            email=request.form.get('email'),
+            cartao=request.form.get('cartao', '').strip() or None,
+            data_matricula=ler_data(request.form.get('data_matricula')),
+            status=request.form['status']
+        )
+        # Um hash só: feito na hora, o aluno já pode entrar mesmo sem 'flask worker' rodando
+        definir_senha_inicial(novo_aluno)
+        db.session.add(novo_aluno)
+        db.session.commit()
+        
+        if current_user.is_authenticated:
+            return redirect(url_for('alunos.lista_alunos'))
+        else:
+            return redirect(url_for('principal.login'))
+    return render_template('form_aluno.html', aluno=None)
+
+@bp_alunos.route('/aluno/editar/<int:aluno_id>', methods=['GET', 'POST'])
+@login_required
+def editar_aluno(aluno_id):
+    if current_user.tipo_usuario == 'Aluno' and current_user.id != aluno_id:
+        return redirect(url_for('principal.index'))
+
+    aluno = Aluno.query.get_or_404(aluno_id)
+    if request.method == 'POST':
+        if ler_data(request.form['data_nascimento']) is None:
+            flash('Data de nascimento inválida.', 'danger')
+            return render_template('form_aluno.html', aluno=aluno)
+        aluno.nome = request.form['nome']
+        aluno.cpf = request.form['cpf']
+        aluno.data_nascimento = ler_data(request.form['data_nascimento'])
+        aluno.endereco = request.form.get('endereco')
+        aluno.cidade = request.form.get('cidade')
+        aluno.estado = request.form.get('estado')
+        aluno.cep = request.form.get('cep')
+        aluno.telefone = request.form.get('telefone')
+        aluno.email = request.form.get('email')
+        aluno.data_matricula = ler_data(request.form.get('data_matricula'))
+        aluno.status = request.form['status']
+        if 'cartao' in request.form:  # campo só aparece para funcionários
+            aluno.cartao = request.form['cartao'].strip() or None
+        
+        foto_filename = foto_enviada()
+        if foto_filename and foto_filename != aluno.foto:
+            agendar_remocao_foto(aluno.foto)
+            aluno.foto = foto_filename
+
+        db.session.commit()
+        return redirect(url_for('alunos.perfil_aluno', aluno_id=aluno.id))
+    return render_template('form_aluno.html', aluno=aluno)
+
+@bp_alunos.route('/aluno/excluir/<int:aluno_id>', methods=['POST'])
+@login_required
+def excluir_aluno(aluno_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    aluno_para_excluir = Aluno.query.get_or_404(aluno_id)
+    agendar_remocao_foto(aluno_para_excluir.foto)
+    db.session.delete(aluno_para_excluir)
+    db.session.commit()
+    return redirect(url_for('alunos.lista_alunos'))
+
+MENSAGENS_CHECKIN = {
+    'registrado': ('Check-in registrado: {nome}.', 'success'),
+    'repetido': ('{nome} já fez check-in há poucos minutos.', 'warning'),
+    'inativo': ('Matrícula de {nome} está inativa.', 'danger'),
+    'desconhecido': ('Nenhum aluno encontrado para este código.', 'danger'),
+    'falhou': ('Check-in de {nome} recebido, mas a gravação falhou; ele será gravado na próxima tentativa.', 'warning'),
+}
+
+@bp_alunos.route('/checkin', methods=['GET', 'POST'])
+@login_required
+def checkin():
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    if request.method == 'POST':
+        tipo = 'cpf' if request.form.get('tipo') == 'cpf' else 'cartao'
+        aluno, situacao = registrar_checkin(tipo, request.form.get('codigo', ''))
+        mensagem, categoria = MENSAGENS_CHECKIN[situacao]
+        flash(mensagem.format(nome=aluno[1] if aluno else ''), categoria)
+        return redirect(url_for('alunos.checkin', tipo=tipo))
+    return render_template('checkin.html', ocupacao=ocupacao_em_cache())
+
+@bp_alunos.route('/api/checkin', methods=['POST'])
+@login_required
+def api_checkin():
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    dados = request.get_json(silent=True) or {}
+    tipo = 'cpf' if dados.get('cpf') else 'cartao'
+    codigo = str(dados.get(tipo) or '')
+    if not codigo.strip():
+        return jsonify({'erro': "informe 'cpf' ou 'cartao'"}), 400
+    aluno, situacao = registrar_checkin(tipo, codigo)
+    if aluno is None:
+        return jsonify({'erro': MENSAGENS_CHECKIN[situacao][0]}), 404
+    corpo = {'aluno_id': aluno[0], 'nome': aluno[1], 'situacao': situacao}
+    if situacao == 'inativo':
+        return jsonify(dict(corpo, erro='matrícula inativa')), 403
+    if situacao == 'falhou':
+        return jsonify(dict(corpo, erro='falha ao gravar o check-in; ele será gravado na próxima tentativa')), 503
+    return jsonify(corpo), 201 if situacao == 'registrado' else 200
@@ -0,0 +1,240 @@
+import json
+import gzip
+from datetime import date, datetime
+from operator import attrgetter
+
+from werkzeug.exceptions import HTTPException
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from flask_login import current_user, login_required
+from sqlalchemy.orm import joinedload, lazyload, load_only, selectinload
+
+try:
+    import orjson
+except ImportError:  # sem orjson a API serializa com o json da biblioteca padrão
+    orjson = None
+try:
+    import brotli
+except ImportError:  # sem brotli a API comprime só com gzip
+    brotli = None
+
+from ..modelos import Aluno, Exercicio, Funcionario, ItemTreino, Treino
+from ..versoes import etag_da_requisicao
+from ..paginacao import ler_tamanho_pagina
+
+bp_api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# --- API JSON versionada (/api/v1) para quiosque e aplicativo ---
+# GET /api/v1/<recurso> lista por id (cursor 'apos') ou, com ?ids=1,2,3, busca vários registros numa
+# consulta só; GET /api/v1/<recurso>/<id> devolve um registro. ?campos=id,nome escolhe os campos e
+# só essas colunas são lidas do banco. O ETag segue as versões das entidades (como nas páginas) e o
+# corpo vai comprimido com brotli ou gzip quando o cliente aceita.
+
+class RecursoApi:
+    """Modelo exposto na API. As chaves de 'cargas' são relacionamentos do modelo, carregados só se pedidos."""
+
+    def __init__(self, modelo, campos, padrao, dependencias, filtros=None, cargas=None, restringir_aluno=None):
+        self.modelo = modelo
+        self.campos = campos
+        self.padrao = padrao
+        self.dependencias = dependencias
+        self.filtros = filtros or {}
+        self.cargas = cargas or {}
+        # Consulta vista por um aluno logado; None = recurso só para funcionários
+        self.restringir_aluno = restringir_aluno
+
+    def ler_campos(self, bruto):
+        if not bruto:
+            return self.padrao
+        nomes = tuple(dict.fromkeys(nome.strip() for nome in bruto.split(',') if nome.strip()))
+        desconhecidos = [nome for nome in nomes if nome not in self.campos]
+        if desconhecidos:
+            raise ValueError(f"campo(s) desconhecido(s): {', '.join(desconhecidos)}")
+        return nomes
+
+    def consulta(self, campos):
+        colunas = [getattr(self.modelo, nome) for nome in campos if nome in self.modelo.__table__.columns]
+        opcoes = [load_only(*colunas)] if colunas else []
+        for nome, carga in self.cargas.items():
+            opcoes.append(carga if nome in campos else lazyload(getattr(self.modelo, nome)))
+        return self.modelo.query.options(*opcoes)
+
+    def serializar(self, registro, campos):
+        return {nome: self.campos[nome](registro) for nome in campos}
+
+def _colunas(modelo, *excluidas):
+    return {coluna.name: attrgetter(coluna.name) for coluna in modelo.__table__.columns if coluna.name not in excluidas}
+
+def _por_id(chave):
+    return lambda ids, filtros: [(chave, registro_id) for registro_id in ids] if ids else [(chave, None)]
+
+def _item_para_api(item):
+    return {'id': item.id, 'exercicio_id': item.exercicio_id, 'exercicio': item.exercicio.nome,
+            'series': item.series, 'repeticoes': item.repeticoes, 'descanso_seg': item.descanso_seg,
+            'observacoes': item.observacoes}
+
+RECURSOS_API = {
+    'alunos': RecursoApi(
+        Aluno, _colunas(Aluno, 'senha_hash', 'dia_aniversario'),
+        padrao=('id', 'nome', 'cpf', 'email', 'status', 'foto'),
+        dependencias=_por_id('Aluno'),
+        filtros={'cpf': (Aluno.cpf, str), 'status': (Aluno.status, str)},
+        restringir_aluno=lambda consulta: consulta.filter(Aluno.id == current_user.id)),
+    'funcionarios': RecursoApi(
+        Funcionario, _colunas(Funcionario, 'senha_hash'),
+        padrao=('id', 'nome', 'cargo', 'email', 'foto'),
+        dependencias=_por_id('Funcionario'),
+        filtros={'cargo': (Funcionario.cargo, str)}),
+    'exercicios': RecursoApi(
+        Exercicio, dict(_colunas(Exercicio), grupos=lambda exercicio: [grupo.nome for grupo in exercicio.grupos]),
+        padrao=('id', 'nome', 'grupos', 'descricao'),
+        dependencias=_por_id('Exercicio'),
+        cargas={'grupos': selectinload(Exercicio.grupos)},
+        restringir_aluno=lambda consulta: consulta),
+    'treinos': RecursoApi(
+        Treino, dict(_colunas(Treino), itens=lambda treino: [_item_para_api(item) for item in treino.itens]),
+        padrao=('id', 'nome', 'aluno_id', 'funcionario_id'),
+        # Com 'itens' a resposta também mostra o nome do exercício
+        dependencias=lambda ids, filtros: (
+            [('Treino', treino_id) for treino_id in ids] if ids else
+            [('fichas', filtros['aluno_id'])] if 'aluno_id' in filtros else [('Treino', None)]
+        ) + [('Exercicio', None)],
+        filtros={'aluno_id': (Treino.aluno_id, int), 'funcionario_id': (Treino.funcionario_id, int)},
+        cargas={'itens': selectinload(Treino.itens).joinedload(ItemTreino.exercicio)},
+        restringir_aluno=lambda consulta: consulta.filter(Treino.aluno_id == current_user.id)),
+    'itens': RecursoApi(
+        ItemTreino, dict(_colunas(ItemTreino), exercicio=lambda item: item.exercicio.nome),
+        padrao=('id', 'treino_id', 'exercicio_id', 'series', 'repeticoes', 'descanso_seg', 'observacoes'),
+        # Itens não têm versão própria: a do treino muda a cada item inserido, alterado ou removido
+        dependencias=lambda ids, filtros: [
+            ('Treino', filtros['treino_id']) if 'treino_id' in filtros else ('Treino', None), ('Exercicio', None)],
+        filtros={'treino_id': (ItemTreino.treino_id, int), 'exercicio_id': (ItemTreino.exercicio_id, int)},
+        cargas={'exercicio': joinedload(ItemTreino.exercicio)},
+        restringir_aluno=lambda consulta: consulta.join(ItemTreino.treino).filter(Treino.aluno_id == current_user.id)),
+}
+
+def _json_padrao(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f'{type(valor).__name__} não é serializável em JSON')
+
+def serializar_json(dados):
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return json.dumps(dados, separators=(',', ':'), ensure_ascii=False, default=_json_padrao).encode('utf-8')
+
+def codificacao_aceita():
+    disponiveis = ('br', 'gzip') if brotli is not None else ('gzip',)
+    return request.accept_encodings.best_match(disponiveis)
+
+def comprimir(corpo, codificacao):
+    if codificacao == 'br':
+        return brotli.compress(corpo, quality=current_app.config['API_BROTLI_QUALIDADE'])
+    return gzip.compress(corpo, compresslevel=current_app.config['API_GZIP_NIVEL'])
+
+def resposta_api(dependencias, gerar):
+    """Como resposta_condicional, mas 'gerar' devolve os dados e o corpo sai em JSON compacto e comprimido."""
+    codificacao = codificacao_aceita()
+    # Cada codificação é uma representação diferente e precisa de um ETag próprio
+    etag = etag_da_requisicao(dependencias) + (f'-{codificacao}' if codificacao else '')
+    if request.if_none_match.contains(etag):
+        resposta = Response(status=304)
+    else:
+        corpo = serializar_json(gerar())
+        resposta = Response(corpo, mimetype='application/json')
+        if codificacao and len(corpo) >= current_app.config['API_COMPRESSAO_MINIMO']:
+            resposta.set_data(comprimir(corpo, codificacao))
+            resposta.content_encoding = codificacao
+    resposta.set_etag(etag)
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    resposta.vary.update(('Cookie', 'Accept-Encoding'))
+    return resposta
+
+def recurso_da_requisicao(nome):
+    recurso = RECURSOS_API.get(nome)
+    if recurso is None:
+        abort(404)
+    if current_user.tipo_usuario != 'Funcionario' and recurso.restringir_aluno is None:
+        abort(403)
+    return recurso
+
+def consulta_api(recurso, campos):
+    consulta = recurso.consulta(campos)
+    if current_user.tipo_usuario != 'Funcionario':
+        consulta = recurso.restringir_aluno(consulta)
+    return consulta
+
+def ler_filtros(recurso):
+    filtros = {}
+    for nome, (_, tipo) in recurso.filtros.items():
+        bruto = request.args.get(nome)
+        if bruto is not None:
+            try:
+                filtros[nome] = tipo(bruto)
+            except ValueError:
+                raise ValueError(f"valor inválido para '{nome}': {bruto}")
+    return filtros
+
+def ler_ids():
+    bruto = request.args.get('ids', '')
+    try:
+        ids = list(dict.fromkeys(int(parte) for parte in bruto.split(',') if parte.strip()))
+    except ValueError:
+        raise ValueError("'ids' deve ser uma lista de números separados por vírgula")
+    if len(ids) > current_app.config['API_MAX_IDS']:
+        raise ValueError(f"no máximo {current_app.config['API_MAX_IDS']} ids por requisição")
+    return ids
+
+@bp_api.errorhandler(HTTPException)
+def erro_api(erro):
+    return jsonify({'erro': erro.description}), erro.code
+
+@bp_api.route('/')
+@login_required
+def api_indice():
+    return jsonify({'versao': 1, 'recursos': {
+        nome: {'campos': list(recurso.campos), 'padrao': list(recurso.padrao), 'filtros': list(recurso.filtros)}
+        for nome, recurso in RECURSOS_API.items()
+    }})
+
+@bp_api.route('/<nome>')
+@login_required
+def api_listar(nome):
+    recurso = recurso_da_requisicao(nome)
+    try:
+        campos = recurso.ler_campos(request.args.get('campos'))
+        filtros = ler_filtros(recurso)
+        ids = ler_ids()
+        apos = request.args.get('apos', 0, type=int)
+    except ValueError as erro:
+        return jsonify({'erro': str(erro)}), 400
+    modelo = recurso.modelo
+
+    def gerar():
+        consulta = consulta_api(recurso, campos).filter(
+            *(recurso.filtros[filtro][0] == valor for filtro, valor in filtros.items()))
+        if ids:
+            # Lote: uma consulta para todos os ids, resposta na ordem pedida
+            por_id = {registro.id: registro for registro in consulta.filter(modelo.id.in_(ids))}
+            return {'itens': [recurso.serializar(por_id[registro_id], campos) for registro_id in ids if registro_id in por_id],
+                    'nao_encontrados': [registro_id for registro_id in ids if registro_id not in por_id]}
+        por_pagina = ler_tamanho_pagina()
+        registros = consulta.filter(modelo.id > apos).order_by(modelo.id).limit(por_pagina + 1).all()
+        proximo = registros[por_pagina - 1].id if len(registros) > por_pagina else None
+        return {'itens': [recurso.serializar(registro, campos) for registro in registros[:por_pagina]],
+                'proximo': proximo}
+    return resposta_api(recurso.dependencias(ids, filtros), gerar)
+
+@bp_api.route('/<nome>/<int:registro_id>')
+@login_required
+def api_obter(nome, registro_id):
+    recurso = recurso_da_requisicao(nome)
+    try:
+        campos = recurso.ler_campos(request.args.get('campos'))
+    except ValueError as erro:
+        return jsonify({'erro': str(erro)}), 400
+
+    def gerar():
+        registro = consulta_api(recurso, campos).filter(recurso.modelo.id == registro_id).first_or_404()
+        return recurso.serializar(registro, campos)
+    return resposta_api(recurso.dependencias([registro_id], {}), gerar)
@@ -0,0 +1,24 @@
+from flask import Blueprint, abort, jsonify, request
+from flask_login import current_user, login_required
+
+from ..modelos import Aluno, Exercicio, Funcionario
+from ..busca import buscar_ranqueado
+from ..paginacao import aluno_para_dict, exercicio_para_dict, funcionario_para_dict, ler_tamanho_pagina
+
+bp_busca = Blueprint('busca', __name__)
+
+TIPOS_BUSCA = {
+    'alunos': (Aluno, aluno_para_dict),
+    'funcionarios': (Funcionario, funcionario_para_dict),
+    'exercicios': (Exercicio, exercicio_para_dict),
+}
+
+@bp_busca.route('/api/busca/<tipo>')
+@login_required
+def api_busca(tipo):
+    if current_user.tipo_usuario != 'Funcionario' or tipo not in TIPOS_BUSCA:
+        abort(404)
+    modelo, serializar = TIPOS_BUSCA[tipo]
+    search = request.args.get('q', '')
+    resultados = buscar_ranqueado(modelo, search, ler_tamanho_pagina()) if search else []
+    return jsonify({'itens': [serializar(r) for r in resultados]})
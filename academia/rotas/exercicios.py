@@ -0,0 +1,129 @@
+from flask import Blueprint, Response, abort, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from ..extensoes import db
+from ..modelos import Exercicio, GrupoMuscular, exercicio_grupo
+from ..busca import filtro_busca
+from ..versoes import resposta_condicional
+from ..catalogo import catalogo_exercicios
+from ..paginacao import exercicio_para_dict, ler_tamanho_pagina, paginar_por_nome, resposta_paginada
+
+bp_exercicios = Blueprint('exercicios', __name__)
+
+def consulta_exercicios(search, grupo=None):
+    query = Exercicio.query.options(selectinload(Exercicio.grupos))
+    if search:
+        query = query.filter(filtro_busca(Exercicio, search))
+    if grupo:
+        # Usa o índice único de grupos_musculares.nome e o de exercicio_grupo.grupo_id
+        ids_do_grupo = select(exercicio_grupo.c.exercicio_id) \
+            .join(GrupoMuscular, GrupoMuscular.id == exercicio_grupo.c.grupo_id) \
+            .where(GrupoMuscular.nome == grupo)
+        query = query.filter(Exercicio.id.in_(ids_do_grupo))
+    return query
+
+def grupos_por_nome(nomes):
+    """Retorna os GrupoMuscular dos nomes informados, criando os que ainda não existem."""
+    nomes = list(dict.fromkeys(n.strip() for n in nomes if n and n.strip()))
+    if not nomes:
+        return []
+    existentes = {g.nome: g for g in GrupoMuscular.query.filter(GrupoMuscular.nome.in_(nomes))}
+    for nome in nomes:
+        if nome in existentes:
+            continue
+        try:
+            with db.session.begin_nested():
+                existentes[nome] = GrupoMuscular(nome=nome)
+                db.session.add(existentes[nome])
+        except IntegrityError:
+            # Criado por outra requisição entre a consulta e o INSERT
+            existentes[nome] = GrupoMuscular.query.filter_by(nome=nome).first()
+            if existentes[nome] is None:
+                raise
+    return [existentes[nome] for nome in nomes]
+
+@bp_exercicios.route('/exercicios')
+@login_required
+def lista_exercicios():
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+
+    def gerar():
+        exercicios, proximo_cursor = paginar_por_nome(
+            consulta_exercicios(request.args.get('q'), request.args.get('grupo')), Exercicio)
+        # Só os parâmetros que mudam a lista entram na chave do fragmento; o resto da URL é ignorado
+        chave = (request.args.get('q', ''), request.args.get('grupo', ''), request.args.get('apos', ''),
+                 ler_tamanho_pagina())
+        return render_template('lista_exercicios.html', exercicios=exercicios, proximo_cursor=proximo_cursor,
+                               chave_fragmento=chave)
+    return resposta_condicional([('Exercicio', None)], gerar)
+
+@bp_exercicios.route('/api/exercicios')
+@login_required
+def api_exercicios():
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    exercicios, proximo_cursor = paginar_por_nome(
+        consulta_exercicios(request.args.get('q'), request.args.get('grupo')), Exercicio)
+    return resposta_paginada(exercicios, proximo_cursor, exercicio_para_dict)
+
+@bp_exercicios.route('/exercicio/novo', methods=['GET', 'POST'])
+@login_required
+def novo_exercicio():
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    if request.method == 'POST':
+        novo_ex = Exercicio(
+            nome=request.form['nome'],
+            grupos=grupos_por_nome(request.form.getlist('grupo_muscular')),
+            descricao=request.form.get('descricao')
+        )
+        db.session.add(novo_ex)
+        db.session.commit()
+        return redirect(url_for('exercicios.lista_exercicios'))
+    return render_template('form_exercicio.html', exercicio=None)
+
+@bp_exercicios.route('/exercicio/editar/<int:exercicio_id>', methods=['GET', 'POST'])
+@login_required
+def editar_exercicio(exercicio_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    exercicio = Exercicio.query.get_or_404(exercicio_id)
+    if request.method == 'POST':
+        # Grupos primeiro: o savepoint de grupos_por_nome não leva junto a troca de nome
+        exercicio.grupos = grupos_por_nome(request.form.getlist('grupo_muscular'))
+        exercicio.nome = request.form['nome']
+        exercicio.descricao = request.form.get('descricao')
+        db.session.commit()
+        return redirect(url_for('exercicios.lista_exercicios'))
+    return render_template('form_exercicio.html', exercicio=exercicio)
+
+@bp_exercicios.route('/exercicio/excluir/<int:exercicio_id>', methods=['POST'])
+@login_required
+def excluir_exercicio(exercicio_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    exercicio_para_excluir = Exercicio.query.get_or_404(exercicio_id)
+    db.session.delete(exercicio_para_excluir)
+    db.session.commit()
+    return redirect(url_for('exercicios.lista_exercicios'))
+
+@bp_exercicios.route('/api/exercicios/catalogo')
+@login_required
+def api_catalogo_exercicios():
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    corpo, versao = catalogo_exercicios()
+    resposta = Response(corpo, mimetype='application/json')
+    resposta.set_etag(versao)
+    # A página pede ?v=<versão>; essa URL nunca muda de conteúdo e pode ficar no cache do navegador
+    if request.args.get('v') == versao:
+        resposta.cache_control.private = True
+        resposta.cache_control.max_age = 31536000
+        resposta.cache_control.immutable = True
+    else:
+        resposta.cache_control.no_cache = True
+    return resposta.make_conditional(request)
@@ -0,0 +1,14 @@
+from flask import Blueprint, current_app, send_from_directory
+
+from ..fotos import PADRAO_FOTO_HASH
+
+bp_fotos = Blueprint('fotos', __name__)
+
+@bp_fotos.route('/fotos/<path:nome>')
+def arquivo_foto(nome):
+    # Nomes com hash nunca mudam de conteúdo, então podem ficar em cache por um ano
+    imutavel = PADRAO_FOTO_HASH.match(nome)
+    resposta = send_from_directory(current_app.config['UPLOAD_FOLDER'], nome, max_age=31536000 if imutavel else 300)
+    if imutavel:
+        resposta.cache_control.immutable = True
+    return resposta
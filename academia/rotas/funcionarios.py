@@ -0,0 +1,104 @@
+from flask import Blueprint, abort, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+
+from ..extensoes import db
+from ..modelos import Funcionario
+from ..datas import ler_data
+from ..busca import filtro_busca
+from ..versoes import resposta_condicional
+from ..usuarios import definir_senha_inicial
+from ..fotos import FOTO_PADRAO, agendar_remocao_foto, foto_enviada
+from ..paginacao import funcionario_para_dict, paginar_por_nome, resposta_paginada
+
+bp_funcionarios = Blueprint('funcionarios', __name__)
+
+def consulta_funcionarios(search):
+    query = Funcionario.query
+    if search:
+        query = query.filter(filtro_busca(Funcionario, search))
+    return query
+
+@bp_funcionarios.route('/funcionarios')
+@login_required
+def lista_funcionarios():
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    
+    funcionarios, proximo_cursor = paginar_por_nome(consulta_funcionarios(request.args.get('q')), Funcionario)
+    return render_template('lista_funcionarios.html', funcionarios=funcionarios, proximo_cursor=proximo_cursor)
+
+@bp_funcionarios.route('/api/funcionarios')
+@login_required
+def api_funcionarios():
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    funcionarios, proximo_cursor = paginar_por_nome(consulta_funcionarios(request.args.get('q')), Funcionario)
+    return resposta_paginada(funcionarios, proximo_cursor, funcionario_para_dict)
+
+@bp_funcionarios.route('/funcionario/perfil/<int:funcionario_id>')
+@login_required
+def perfil_funcionario(funcionario_id):
+    return resposta_condicional([('Funcionario', funcionario_id)], lambda: render_template(
+        'perfil_funcionario.html', funcionario=Funcionario.query.get_or_404(funcionario_id)))
+
+@bp_funcionarios.route('/funcionario/novo', methods=['GET', 'POST'])
+def novo_funcionario():
+    if request.method == 'POST':
+        foto_filename = foto_enviada() or FOTO_PADRAO
+
+        novo_funcionario = Funcionario(
+            foto=foto_filename,
+            nome=request.form['nome'],
+            cargo=request.form['cargo'],
+            cref=request.form.get('cref'),
+            endereco=request.form.get('endereco'),
+            cidade=request.form.get('cidade'),
+            estado=request.form.get('estado'),
+            cep=request.form.get('cep'),
+            telefone=request.form.get('telefone'),
+            data_admissao=ler_data(request.form.get('data_admissao')),
+            email=request.form.get('email')
+        )
+        definir_senha_inicial(novo_funcionario)
+        db.session.add(novo_funcionario)
+        db.session.commit()
+        return redirect(url_for('funcionarios.lista_funcionarios') if current_user.is_authenticated else url_for('principal.login'))
+    return render_template('form_funcionario.html', funcionario=None)
+
+@bp_funcionarios.route('/funcionario/editar/<int:funcionario_id>', methods=['GET', 'POST'])
+@login_required
+def editar_funcionario(funcionario_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    funcionario = Funcionario.query.get_or_404(funcionario_id)
+    if request.method == 'POST':
+        funcionario.nome = request.form['nome']
+        funcionario.cargo = request.form['cargo']
+        funcionario.data_admissao = ler_data(request.form.get('data_admissao'))
+        funcionario.cref = request.form.get('cref')
+        funcionario.endereco = request.form.get('endereco')
+        funcionario.cidade = request.form.get('cidade')
+        funcionario.estado = request.form.get('estado')
+        funcionario.cep = request.form.get('cep')
+        funcionario.telefone = request.form.get('telefone')
+        funcionario.email = request.form.get('email')
+
+        foto_filename = foto_enviada()
+        if foto_filename and foto_filename != funcionario.foto:
+            agendar_remocao_foto(funcionario.foto)
+            funcionario.foto = foto_filename
+
+        db.session.commit()
+        return redirect(url_for('funcionarios.perfil_funcionario', funcionario_id=funcionario.id))
+    return render_template('form_funcionario.html', funcionario=funcionario)
+
+@bp_funcionarios.route('/funcionario/excluir/<int:funcionario_id>', methods=['POST'])
+@login_required
+def excluir_funcionario(funcionario_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    funcionario_para_excluir = Funcionario.query.get_or_404(funcionario_id)
+    agendar_remocao_foto(funcionario_para_excluir.foto)
+    db.session.delete(funcionario_para_excluir)
+    db.session.commit()
+    return redirect(url_for('funcionarios.lista_funcionarios'))
@@ -0,0 +1,42 @@
+import io
+import csv
+import click
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+from flask_login import current_user, login_required
+
+from ..lote import CAMPOS_LOTE, FORMATOS_LOTE, ImportacaoLote, formato_do_arquivo, ler_registros, serializar_exportacao
+
+bp_lote = Blueprint('lote', __name__)
+
+@bp_lote.route('/exportar/<tipo>.<formato>')
+@login_required
+def exportar(tipo, formato):
+    if current_user.tipo_usuario != 'Funcionario' or tipo not in CAMPOS_LOTE or formato not in FORMATOS_LOTE:
+        abort(404)
+    tipos_mime = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson', 'json': 'application/json'}
+    return Response(
+        stream_with_context(serializar_exportacao(tipo, formato)),
+        mimetype=tipos_mime[formato],
+        headers={'Content-Disposition': f'attachment; filename={tipo}.{formato}'},
+    )
+
+@bp_lote.route('/importar/<tipo>', methods=['POST'])
+@login_required
+def importar(tipo):
+    if current_user.tipo_usuario != 'Funcionario' or tipo not in CAMPOS_LOTE:
+        abort(404)
+    request.max_content_length = current_app.config['IMPORTACAO_MAX_BYTES']
+    arquivo = request.files.get('arquivo')
+    if not arquivo or not arquivo.filename:
+        abort(400)
+    try:
+        formato = formato_do_arquivo(arquivo.filename)
+    except click.BadParameter:
+        abort(400)
+    texto = io.TextIOWrapper(arquivo.stream, encoding='utf-8-sig')
+    try:
+        resumo = ImportacaoLote(tipo).executar(ler_registros(texto, formato))
+    except (ValueError, csv.Error) as erro:  # arquivo malformado (JSON/CSV inválido)
+        return jsonify({'tipo': tipo, 'erro': str(erro)}), 400
+    return jsonify(resumo)
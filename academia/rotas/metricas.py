@@ -0,0 +1,23 @@
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from flask_login import current_user, login_required
+
+from ..versoes import cache_fragmentos
+from ..metricas import metricas_requisicoes
+from ..tarefas import fila_tarefas
+
+bp_metricas = Blueprint('metricas', __name__)
+
+@bp_metricas.route('/metrics')
+def metricas():
+    token = current_app.config['METRICAS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    return Response(metricas_requisicoes.exportar() + fila_tarefas.exportar_metricas(),
+                    mimetype='text/plain; version=0.0.4')
+
+@bp_metricas.route('/api/metricas/fragmentos')
+@login_required
+def api_metricas_fragmentos():
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    return jsonify(cache_fragmentos.metricas())
@@ -0,0 +1,58 @@
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required, login_user, logout_user
+
+from ..extensoes import db
+from ..datas import aniversariantes_da_semana
+from ..versoes import versoes_entidades
+from ..dashboard import EstatisticasDetalhadas, cache_dashboard, calcular_estatisticas, painel_detalhado
+from ..usuarios import buscar_usuario_por_email
+from ..frequencia import ocupacao_em_cache
+
+bp_principal = Blueprint('principal', __name__)
+
+@bp_principal.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('principal.index'))
+    
+    if request.method == 'POST':
+        email = request.form['email']
+        senha = request.form['senha']
+        
+        usuario = buscar_usuario_por_email(email, senha)
+        if usuario:
+            if usuario.senha_precisa_atualizar():
+                usuario.set_senha(senha)
+                db.session.commit()
+            login_user(usuario)
+            return redirect(url_for('principal.index'))
+
+        flash('Email ou senha inválidos', 'danger')
+        
+    return render_template('login.html')
+
+@bp_principal.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('principal.login'))
+
+@bp_principal.route('/')
+@login_required
+def index():
+    if current_user.tipo_usuario == 'Aluno':
+        return redirect(url_for('alunos.perfil_aluno', aluno_id=current_user.id))
+    
+    # Cada item vale enquanto as versões (compartilhadas entre os workers) das suas entidades não mudarem
+    estatisticas = cache_dashboard.obter('estatisticas', calcular_estatisticas, versoes_entidades.assinatura(
+        ('Aluno', None), ('Funcionario', None), ('Exercicio', None)))
+    painel = None
+    if current_app.config['DASHBOARD_PAINEL_DETALHADO']:
+        painel = cache_dashboard.obter('painel_detalhado', painel_detalhado, versoes_entidades.assinatura(
+            EstatisticasDetalhadas.DEPENDENCIA, ('Funcionario', None), ('Exercicio', None)))
+    aniversariantes = cache_dashboard.obter('aniversariantes', lambda: [
+        (a.id, a.nome, a.data_nascimento) for a in aniversariantes_da_semana()],
+        versoes_entidades.assinatura(('Aluno', None)))
+    ocupacao = ocupacao_em_cache()
+    return render_template('dashboard.html', painel=painel, aniversariantes=aniversariantes, ocupacao=ocupacao,
+                           **estatisticas)
@@ -0,0 +1,217 @@
+import os
+import re
+
+from flask import Blueprint, Response, abort, flash, jsonify, redirect, render_template, request, send_file, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from ..extensoes import db
+from ..modelos import Aluno, Exercicio, ItemModeloTreino, ItemTreino, ModeloTreino, Treino
+from ..versoes import resposta_condicional
+from ..catalogo import catalogo_exercicios
+from ..lote import ler_campo
+from ..modelos_treino import atribuir_modelo, criar_modelo_de_treino, ids_de_alunos, ler_itens
+from ..fichas import FORMATOS_FICHA, chave_ficha, dados_fichas, diretorio_fichas, gerar_ficha, gravar_enquanto_envia
+
+bp_treinos = Blueprint('treinos', __name__)
+
+@bp_treinos.route('/aluno/<int:aluno_id>/treinos')
+@login_required
+def gerenciar_treinos(aluno_id):
+    if current_user.tipo_usuario == 'Aluno' and current_user.id != aluno_id:
+        return redirect(url_for('principal.index'))
+
+    def gerar():
+        # Carrega fichas, professor, itens e exercícios de uma vez (evita N+1 no template)
+        aluno = Aluno.query.options(
+            selectinload(Aluno.treinos).options(
+                joinedload(Treino.funcionario),
+                selectinload(Treino.itens).joinedload(ItemTreino.exercicio).selectinload(Exercicio.grupos)
+            )
+        ).filter_by(id=aluno_id).first_or_404()
+        is_funcionario = (current_user.tipo_usuario == 'Funcionario')
+        versao_catalogo = catalogo_exercicios()[1] if is_funcionario else None
+        return render_template('gerenciar_treinos.html', aluno=aluno, versao_catalogo=versao_catalogo,
+                               is_funcionario=is_funcionario)
+    return resposta_condicional(
+        [('Aluno', aluno_id), ('fichas', aluno_id), ('Funcionario', None), ('Exercicio', None)], gerar)
+
+@bp_treinos.route('/aluno/<int:aluno_id>/treino/novo', methods=['POST'])
+@login_required
+def novo_treino(aluno_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    nome_treino = request.form['nome_treino']
+    novo_treino = Treino(
+        nome=nome_treino,
+        aluno_id=aluno_id,
+        funcionario_id=current_user.id 
+    )
+    db.session.add(novo_treino)
+    db.session.commit()
+    return redirect(url_for('treinos.gerenciar_treinos', aluno_id=aluno_id))
+
+@bp_treinos.route('/treino/<int:treino_id>/excluir', methods=['POST'])
+@login_required
+def excluir_treino(treino_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    treino = Treino.query.get_or_404(treino_id)
+    aluno_id = treino.aluno_id
+    db.session.delete(treino)
+    db.session.commit()
+    return redirect(url_for('treinos.gerenciar_treinos', aluno_id=aluno_id))
+
+@bp_treinos.route('/treino/<int:treino_id>/adicionar_item', methods=['POST'])
+@login_required
+def adicionar_item_treino(treino_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    treino = Treino.query.get_or_404(treino_id)
+    exercicio_id = request.form.get('exercicio_id', '')
+    if not exercicio_id.isdigit() or db.session.get(Exercicio, int(exercicio_id)) is None:
+        flash('Escolha um exercício da lista.', 'danger')
+        return redirect(url_for('treinos.gerenciar_treinos', aluno_id=treino.aluno_id))
+    novo_item = ItemTreino(
+        treino_id=treino.id,
+        exercicio_id=int(exercicio_id),
+        series=request.form.get('series'),
+        repeticoes=request.form.get('repeticoes'),
+        descanso_seg=request.form.get('descanso_seg'),
+        observacoes=request.form.get('observacoes')
+    )
+    db.session.add(novo_item)
+    db.session.commit()
+    return redirect(url_for('treinos.gerenciar_treinos', aluno_id=treino.aluno_id))
+
+@bp_treinos.route('/item_treino/<int:item_id>/excluir', methods=['POST'])
+@login_required
+def excluir_item_treino(item_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    item = ItemTreino.query.get_or_404(item_id)
+    aluno_id = item.treino.aluno_id
+    db.session.delete(item)
+    db.session.commit()
+    return redirect(url_for('treinos.gerenciar_treinos', aluno_id=aluno_id))
+
+@bp_treinos.route('/modelos')
+@login_required
+def lista_modelos():
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    # Contagem por subconsulta (sem GROUP BY) para o autor vir no mesmo SELECT, sem uma consulta por autor
+    total_itens = select(func.count(ItemModeloTreino.id)) \
+        .where(ItemModeloTreino.modelo_id == ModeloTreino.id).scalar_subquery()
+    modelos = db.session.execute(
+        select(ModeloTreino, total_itens).options(joinedload(ModeloTreino.funcionario)).order_by(ModeloTreino.nome)
+    ).all()
+    return render_template('modelos_treino.html', modelos=modelos)
+
+@bp_treinos.route('/treino/<int:treino_id>/salvar_modelo', methods=['POST'])
+@login_required
+def salvar_modelo(treino_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    treino = Treino.query.get_or_404(treino_id)
+    modelo = criar_modelo_de_treino(treino, request.form.get('nome_modelo') or treino.nome, current_user.id)
+    flash(f'Modelo "{modelo.nome}" salvo.', 'success')
+    return redirect(url_for('treinos.gerenciar_treinos', aluno_id=treino.aluno_id))
+
+@bp_treinos.route('/modelo/<int:modelo_id>/atribuir', methods=['POST'])
+@login_required
+def atribuir_modelo_alunos(modelo_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    modelo = ModeloTreino.query.get_or_404(modelo_id)
+    cpfs = re.split(r'[\s,;]+', request.form.get('cpfs', ''))
+    aluno_ids = ids_de_alunos(cpfs=cpfs)
+    criadas = atribuir_modelo(modelo, aluno_ids, current_user.id, request.form.get('nome_treino'))
+    flash(f'{criadas} ficha(s) criada(s) a partir de "{modelo.nome}".', 'success' if criadas else 'warning')
+    return redirect(url_for('treinos.lista_modelos'))
+
+@bp_treinos.route('/modelo/<int:modelo_id>/excluir', methods=['POST'])
+@login_required
+def excluir_modelo(modelo_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        return redirect(url_for('principal.index'))
+    db.session.delete(ModeloTreino.query.get_or_404(modelo_id))
+    db.session.commit()
+    return redirect(url_for('treinos.lista_modelos'))
+
+@bp_treinos.route('/api/treino/<int:treino_id>/itens', methods=['POST'])
+@login_required
+def api_adicionar_itens(treino_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    treino = Treino.query.get_or_404(treino_id)
+    dados = request.get_json(silent=True)
+    try:
+        itens = [ItemTreino(treino_id=treino.id, **item)
+                 for item in ler_itens(dados.get('itens') if isinstance(dados, dict) else dados)]
+    except ValueError as erro:
+        return jsonify({'erro': str(erro)}), 400
+    db.session.add_all(itens)
+    db.session.commit()
+    return jsonify({'treino_id': treino.id, 'ids': [item.id for item in itens]}), 201
+
+@bp_treinos.route('/api/modelos', methods=['POST'])
+@login_required
+def api_criar_modelo():
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    dados = request.get_json(silent=True) or {}
+    try:
+        nome = ler_campo(dados, 'nome', True, 100)
+        itens = [ItemModeloTreino(**item) for item in ler_itens(dados.get('itens'))]
+    except (ValueError, AttributeError) as erro:
+        return jsonify({'erro': str(erro)}), 400
+    modelo = ModeloTreino(nome=nome, funcionario_id=current_user.id, itens=itens)
+    db.session.add(modelo)
+    db.session.commit()
+    return jsonify({'id': modelo.id, 'nome': modelo.nome, 'itens': len(itens)}), 201
+
+@bp_treinos.route('/api/modelos/<int:modelo_id>/atribuir', methods=['POST'])
+@login_required
+def api_atribuir_modelo(modelo_id):
+    if current_user.tipo_usuario != 'Funcionario':
+        abort(403)
+    modelo = ModeloTreino.query.get_or_404(modelo_id)
+    dados = request.get_json(silent=True) or {}
+    try:
+        nome = dados.get('nome')
+        if nome is not None and (not isinstance(nome, str) or not nome.strip()):
+            raise ValueError("'nome' deve ser um texto não vazio")
+        nome = ler_campo(dados, 'nome', tamanho=100)
+        aluno_ids = ids_de_alunos(dados.get('aluno_ids') or (), dados.get('cpfs') or ())
+    except (ValueError, TypeError, AttributeError) as erro:
+        return jsonify({'erro': str(erro)}), 400
+    criadas = atribuir_modelo(modelo, aluno_ids, current_user.id, nome)
+    return jsonify({'modelo_id': modelo.id, 'fichas_criadas': criadas, 'alunos': aluno_ids})
+
+@bp_treinos.route('/aluno/<int:aluno_id>/ficha.<formato>')
+@login_required
+def imprimir_ficha(aluno_id, formato):
+    if current_user.tipo_usuario == 'Aluno' and current_user.id != aluno_id:
+        return redirect(url_for('principal.index'))
+    if formato not in FORMATOS_FICHA:
+        abort(404)
+    dados = dados_fichas([aluno_id]).get(aluno_id)
+    if dados is None:
+        abort(404)
+    chave = chave_ficha(dados, formato)
+    caminho = os.path.join(diretorio_fichas(), f'{chave}.{formato}')
+    if request.if_none_match.contains(chave):
+        resposta = Response(status=304)
+    elif os.path.exists(caminho):
+        os.utime(caminho)  # conta como uso recente para o 'flask limpar-fichas'
+        resposta = send_file(caminho, mimetype=FORMATOS_FICHA[formato], etag=chave)
+    else:
+        resposta = Response(gravar_enquanto_envia(gerar_ficha(dados, formato), caminho),
+                            mimetype=FORMATOS_FICHA[formato])
+    resposta.set_etag(chave)
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    resposta.headers['Content-Disposition'] = f'inline; filename="ficha-{aluno_id}.{formato}"'
+    return resposta
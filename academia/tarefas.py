@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import threading
+import socket
+from datetime import datetime, timedelta
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import and_, event, func, or_, select
+from sqlalchemy.orm import Session
+
+from .extensoes import db, estado_da_aplicacao
+from .modelos import Tarefa
+from .metricas import Histograma
+
+# --- Fila de tarefas (tabela 'tarefas' no próprio banco, sem broker externo) ---
+# Efeitos colaterais lentos (miniaturas, remoção de fotos) são gravados
+# como tarefas na mesma transação da alteração que os originou: só existem se o commit acontecer.
+# Um thread por processo web (TAREFAS_MODO='thread') ou 'flask worker' (TAREFAS_MODO='externo')
+# reserva cada tarefa com um UPDATE condicional, de modo que vários consumidores podem disputar
+# a fila. Falhas voltam para a fila com espera exponencial até max_tentativas.
+
+TAREFAS = {}
+
+def tarefa(nome=None, max_tentativas=3):
+    """Registra a função como tipo de tarefa; ela roda no contexto da aplicação, com os argumentos do JSON."""
+    def registrar(funcao):
+        TAREFAS[nome or funcao.__name__] = (funcao, max_tentativas)
+        return funcao
+    return registrar
+
+def enfileirar(tipo, atraso=0, **argumentos):
+    """Adiciona a tarefa à sessão atual; ela é gravada (e o consumidor avisado) no próximo commit."""
+    if tipo not in TAREFAS:
+        raise ValueError(f"tarefa desconhecida: '{tipo}'")
+    agora = datetime.now()
+    registro = Tarefa(tipo=tipo, argumentos=json.dumps(argumentos), estado='pendente', tentativas=0,
+                      max_tentativas=TAREFAS[tipo][1], criada_em=agora,
+                      executar_apos=agora + timedelta(seconds=atraso))
+    db.session.add(registro)
+    db.session.info['tarefas_novas'] = True
+    return registro
+
+@event.listens_for(Session, 'after_commit')
+def avisar_tarefas_novas(session):
+    if session.info.pop('tarefas_novas', False):
+        fila_tarefas.avisar()
+
+class FilaTarefas:
+    def __init__(self):
+        self.identificador = f'{socket.gethostname()}:{os.getpid()}'
+        self._novas = threading.Event()
+        self.parar = threading.Event()
+        self._thread = (None, None)
+        self._lock = threading.Lock()
+        self._ultima_limpeza = 0.0
+        self.execucoes = Counter()
+        self.duracoes = {}
+
+    def avisar(self):
+        self._novas.set()
+
+    def iniciar_thread(self, app):
+        # Como o executor de imagens: o thread não sobrevive ao fork, cada processo inicia o seu
+        with self._lock:
+            pid, thread = self._thread
+            if pid == os.getpid() and thread.is_alive():
+                return
+            self.identificador = f'{socket.gethostname()}:{os.getpid()}'
+            thread = threading.Thread(target=self.laco, args=(app, app.config['TAREFAS_INTERVALO']),
+                                      name='tarefas', daemon=True)
+            thread.start()
+            self._thread = (os.getpid(), thread)
+
+    @property
+    def pid_thread(self):
+        return self._thread[0]
+
+    def reservar(self):
+        """Marca a próxima tarefa pronta como 'executando' e a devolve, ou None se não houver."""
+        tarefas = Tarefa.__table__
+        while True:
+            agora = datetime.now()
+            prontas = or_(
+                and_(tarefas.c.estado == 'pendente', tarefas.c.executar_apos <= agora),
+                # Consumidor que morreu no meio da tarefa
+                and_(tarefas.c.estado == 'executando',
+                     tarefas.c.iniciada_em < agora - timedelta(seconds=current_app.config['TAREFAS_TIMEOUT'])),
+            )
+            candidata = db.session.scalar(
+                select(tarefas.c.id).where(prontas).order_by(tarefas.c.executar_apos, tarefas.c.id).limit(1))
+            if candidata is None:
+                db.session.rollback()
+                return None
+            # Outro consumidor pode ter reservado entre o SELECT e o UPDATE: aí nenhuma linha volta
+            reservada = db.session.execute(
+                tarefas.update().where(tarefas.c.id == candidata, prontas)
+                .values(estado='executando', iniciada_em=agora, worker=self.identificador,
+                        tentativas=tarefas.c.tentativas + 1)
+                .returning(tarefas.c.id, tarefas.c.tipo, tarefas.c.argumentos, tarefas.c.tentativas,
+                           tarefas.c.max_tentativas)
+            ).first()
+            db.session.commit()
+            if reservada is not None:
+                return reservada
+
+    def executar(self, reservada):
+        tarefa_id, tipo, argumentos, tentativas, max_tentativas = reservada
+        inicio = time.perf_counter()
+        try:
+            if tipo not in TAREFAS:
+                raise LookupError(f"tarefa desconhecida: '{tipo}'")
+            if tentativas > max_tentativas:
+                raise TimeoutError('tempo esgotado na última tentativa')
+            TAREFAS[tipo][0](**json.loads(argumentos))
+            valores = {'estado': 'concluida', 'concluida_em': datetime.now(), 'erro': None}
+            resultado = 'concluida'
+        except Exception as erro:
+            db.session.rollback()
+            definitiva = tentativas >= max_tentativas or isinstance(erro, LookupError)
+            espera = current_app.config['TAREFAS_ESPERA_BASE'] * 2 ** (tentativas - 1)
+            valores = {'estado': 'falhou' if definitiva else 'pendente', 'erro': f'{type(erro).__name__}: {erro}'}
+            if not definitiva:
+                valores['executar_apos'] = datetime.now() + timedelta(seconds=espera)
+            resultado = 'falhou' if definitiva else 'repetir'
+            current_app.logger.warning('Tarefa %s (%s) falhou na tentativa %s/%s: %s', tarefa_id, tipo,
+                                       tentativas, max_tentativas, valores['erro'])
+        db.session.execute(Tarefa.__table__.update().where(Tarefa.__table__.c.id == tarefa_id).values(**valores))
+        db.session.commit()
+        with self._lock:
+            self.execucoes[(tipo, resultado)] += 1
+            self.duracoes.setdefault(tipo, Histograma()).observar(time.perf_counter() - inicio)
+        return resultado
+
+    def processar_pendentes(self):
+        processadas = 0
+        while not self.parar.is_set():
+            reservada = self.reservar()
+            if reservada is None:
+                break
+            self.executar(reservada)
+            processadas += 1
+        return processadas
+
+    def limpar(self, dias):
+        tarefas = Tarefa.__table__
+        apagadas = db.session.execute(tarefas.delete().where(
+            tarefas.c.estado == 'concluida',
+            tarefas.c.concluida_em < datetime.now() - timedelta(days=dias))).rowcount
+        db.session.commit()
+        return apagadas
+
+    def laco(self, app, intervalo):
+        while not self.parar.is_set():
+            self._novas.clear()
+            try:
+                with app.app_context():
+                    self.processar_pendentes()
+                    if time.monotonic() - self._ultima_limpeza > 3600:
+                        self._ultima_limpeza = time.monotonic()
+                        self.limpar(app.config['TAREFAS_RETENCAO_DIAS'])
+            except Exception:  # o thread só é iniciado uma vez por processo: não pode morrer
+                app.logger.exception('Fila de tarefas: erro no consumo, nova tentativa em %ss', intervalo)
+            self._novas.wait(intervalo)
+
+    def profundidade(self):
+        return db.session.execute(
+            select(Tarefa.estado, Tarefa.tipo, func.count()).group_by(Tarefa.estado, Tarefa.tipo)).all()
+
+    def exportar_metricas(self):
+        linhas = ['# HELP academia_tarefas Tarefas na fila por estado e tipo.', '# TYPE academia_tarefas gauge']
+        for estado, tipo, total in self.profundidade():
+            linhas.append(f'academia_tarefas{{estado="{estado}",tipo="{tipo}"}} {total}')
+        mais_antiga = db.session.scalar(select(func.min(Tarefa.executar_apos)).where(
+            Tarefa.estado == 'pendente', Tarefa.executar_apos <= datetime.now()))
+        atraso = (datetime.now() - mais_antiga).total_seconds() if mais_antiga else 0.0
+        linhas += ['# HELP academia_tarefas_atraso_segundos Espera da tarefa pronta mais antiga.',
+                   '# TYPE academia_tarefas_atraso_segundos gauge',
+                   f'academia_tarefas_atraso_segundos {atraso:.3f}',
+                   '# HELP academia_tarefas_executadas_total Tarefas executadas neste processo por resultado.',
+                   '# TYPE academia_tarefas_executadas_total counter']
+        with self._lock:
+            for (tipo, resultado), total in sorted(self.execucoes.items()):
+                linhas.append(f'academia_tarefas_executadas_total{{tipo="{tipo}",resultado="{resultado}"}} {total}')
+            linhas += ['# HELP academia_tarefa_segundos Duração das tarefas executadas neste processo.',
+                       '# TYPE academia_tarefa_segundos histogram']
+            for tipo, histograma in sorted(self.duracoes.items()):
+                linhas.extend(histograma.linhas('academia_tarefa_segundos', f'tipo="{tipo}"'))
+        return '\n'.join(linhas) + '\n'
+
+fila_tarefas = estado_da_aplicacao('fila_tarefas')
+
+def iniciar_fila_local():
+    # Uma vez por processo: depois da primeira requisição do worker é só a comparação do pid
+    if fila_tarefas.pid_thread != os.getpid() and current_app.config['TAREFAS_MODO'] == 'thread':
+        fila_tarefas.iniciar_thread(current_app._get_current_object())
@@ -0,0 +1,55 @@
+from werkzeug.security import check_password_hash
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from .extensoes import db, estado_da_aplicacao, login_manager
+from .modelos import Aluno, Funcionario
+from .versoes import versoes_entidades
+
+cache_usuarios = estado_da_aplicacao('cache_usuarios')
+
+def _buscar_usuario(user_id):
+    if user_id.startswith('func_'):
+        return Funcionario, int(user_id.split('_')[1])
+    elif user_id.startswith('aluno_'):
+        return Aluno, int(user_id.split('_')[1])
+    return None, None
+
+@login_manager.user_loader
+def load_user(user_id):
+    # O cache guarda uma cópia desanexada junto com a versão do registro em versoes_entidades, lida no
+    # início da requisição: edição, exclusão ou troca de senha em qualquer processo força a releitura.
+    # O merge(load=False) associa a cópia à sessão sem consultar o banco.
+    modelo, id_real = _buscar_usuario(user_id)
+    if modelo is None:
+        return None
+    versao = versoes_entidades.versao((modelo.__name__, id_real))
+    item = cache_usuarios.obter(user_id)
+    if item is None or item[0] != versao:
+        with Session(db.engine) as sessao:
+            usuario = sessao.get(modelo, id_real)
+            if usuario is None:
+                cache_usuarios.remover(user_id)
+                return None
+            sessao.expunge(usuario)
+        item = (versao, usuario)
+        cache_usuarios.guardar(user_id, item)
+    return db.session.merge(item[1], load=False)
+
+SENHA_PADRAO_FUNCIONARIO = '123456'
+
+def definir_senha_inicial(registro):
+    """Senha inicial do cadastro: o CPF para alunos, SENHA_PADRAO_FUNCIONARIO para funcionários."""
+    registro.set_senha(registro.cpf if isinstance(registro, Aluno) else SENHA_PADRAO_FUNCIONARIO)
+
+def buscar_usuario_por_email(email, senha):
+    """Procura funcionários e alunos numa única consulta (os dois emails são únicos/indexados)."""
+    candidatos = db.session.execute(
+        select(text("'func'"), Funcionario.id, Funcionario.senha_hash).where(Funcionario.email == email)
+        .union_all(select(text("'aluno'"), Aluno.id, Aluno.senha_hash).where(Aluno.email == email))
+    ).all()
+    # Funcionário tem prioridade quando o mesmo email existe nas duas tabelas
+    for tipo, id_, senha_hash in sorted(candidatos, key=lambda c: c[0] != 'func'):
+        if senha_hash and check_password_hash(senha_hash, senha):
+            return db.session.get(Funcionario if tipo == 'func' else Aluno, id_)
+    return None
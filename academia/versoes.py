@@ -0,0 +1,280 @@
+import os
+import time
+import threading
+import hashlib
+import tempfile
+
+from flask import Response, g, make_response, request, session
+from markupsafe import Markup
+from flask_login import current_user
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from .extensoes import db, estado_da_aplicacao
+from .caches import CacheLRU
+from .modelos import Aluno, Exercicio, Funcionario, ItemTreino, Treino
+
+# --- Cache de fragmentos renderizados e ETags por versão das entidades ---
+# Cada alteração confirmada incrementa a versão de (modelo, id) e, quando a página lista a coleção
+# inteira, a de (modelo, None). Um fragmento só é reaproveitado se as versões das suas dependências
+# forem as mesmas de quando foi gerado. As versões ficam na tabela versoes_entidades, gravadas na
+# mesma transação da alteração, e valem para todos os workers: cada processo mantém um espelho que
+# é atualizado no início da requisição com uma leitura pela chave primária da linha de sequência.
+
+tabela_versoes = db.Table(
+    'versoes_entidades',
+    db.Column('chave', db.String(120), primary_key=True),  # 'Modelo:id', 'Modelo:' para a coleção
+    db.Column('versao', db.Integer, nullable=False, index=True),
+)
+
+class VersoesEntidades:
+    SEQUENCIA = '#'  # linha incrementada a cada transação; as chaves alteradas recebem o novo valor
+    TUDO = ('*', None)  # entra em todas as assinaturas: alterações feitas fora do ORM invalidam tudo
+
+    def __init__(self):
+        self.sequencia = 0  # maior versão já lida do banco
+        self.alteracoes = 0
+        self._versoes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def texto_da_chave(chave):
+        nome, registro_id = chave
+        return f"{nome}:{'' if registro_id is None else registro_id}"
+
+    def gravar(self, conexao, chaves, anteriores=None):
+        """Grava as chaves com uma nova versão na transação de 'conexao'; retorna {chave: versão}.
+
+        Com 'anteriores' (dict), guarda nele a versão que cada chave tinha antes, se ainda não estiver lá.
+        """
+        if not conexao.execute(tabela_versoes.update().where(tabela_versoes.c.chave == self.SEQUENCIA)
+                               .values(versao=tabela_versoes.c.versao + 1)).rowcount:
+            conexao.execute(tabela_versoes.insert().values(chave=self.SEQUENCIA, versao=1))
+        versao = conexao.scalar(select(tabela_versoes.c.versao).where(tabela_versoes.c.chave == self.SEQUENCIA))
+        gravadas = {self.texto_da_chave(chave): versao for chave in chaves}
+        if anteriores is not None:
+            # A linha de sequência já está bloqueada por esta transação: nenhum outro processo grava no meio
+            lidas = dict(conexao.execute(select(tabela_versoes.c.chave, tabela_versoes.c.versao)
+                                         .where(tabela_versoes.c.chave.in_(gravadas))).all())
+            for chave in gravadas:
+                anteriores.setdefault(chave, lidas.get(chave, 0))
+        conexao.execute(tabela_versoes.delete().where(tabela_versoes.c.chave.in_(gravadas)))
+        conexao.execute(tabela_versoes.insert(), [{'chave': chave, 'versao': versao} for chave in gravadas])
+        return gravadas
+
+    def aplicar(self, gravadas):
+        """Após o commit: o próprio processo enxerga a alteração sem esperar a próxima sincronização."""
+        with self._lock:
+            self._versoes.update(gravadas)
+            self.alteracoes += 1
+
+    def sincronizar(self, conexao):
+        sequencia = conexao.scalar(
+            select(tabela_versoes.c.versao).where(tabela_versoes.c.chave == self.SEQUENCIA)) or 0
+        if sequencia == self.sequencia:
+            return
+        # Sequência menor que a vista: o banco foi recriado e o espelho inteiro é descartado
+        desde = self.sequencia if sequencia > self.sequencia else 0
+        linhas = conexao.execute(select(tabela_versoes.c.chave, tabela_versoes.c.versao).where(
+            tabela_versoes.c.versao > desde, tabela_versoes.c.chave != self.SEQUENCIA)).all()
+        with self._lock:
+            if not desde:
+                self._versoes.clear()
+            self._versoes.update(linhas)
+            self.sequencia = max([sequencia] + [versao for _, versao in linhas])
+            self.alteracoes += 1
+
+    def invalidar_tudo(self, conexao):
+        return self.gravar(conexao, [self.TUDO])
+
+    def versao(self, chave):
+        with self._lock:
+            return self._versoes.get(self.texto_da_chave(chave), 0)
+
+    def assinatura(self, *dependencias):
+        with self._lock:
+            partes = tuple(self._versoes.get(self.texto_da_chave(chave), 0) for chave in (self.TUDO,) + dependencias)
+        return hashlib.sha1(repr((dependencias, partes)).encode()).hexdigest()[:20]
+
+versoes_entidades = estado_da_aplicacao('versoes_entidades')
+
+def valor_anterior(registro, atributo):
+    historico = inspect(registro).attrs[atributo].history
+    return historico.deleted[0] if historico.deleted else getattr(registro, atributo)
+
+class FragmentosMemoria:
+    def __init__(self, tamanho, ttl):
+        self._itens = CacheLRU(tamanho, ttl)
+
+    def obter(self, chave):
+        return self._itens.obter(chave)
+
+    def guardar(self, chave, assinatura, conteudo):
+        self._itens.guardar(chave, (assinatura, conteudo))
+
+    def limpar(self):
+        self._itens.limpar()
+
+class FragmentosArquivo:
+    """Um arquivo por fragmento; a primeira linha guarda a assinatura, o resto o HTML.
+
+    A cada 'tamanho' // 10 gravações do processo, os expirados são apagados e, se ainda houver
+    mais de 'tamanho' arquivos, os mais antigos (por data de gravação) também.
+    """
+
+    def __init__(self, diretorio, ttl, tamanho):
+        self.diretorio = diretorio
+        self.ttl = ttl
+        self.tamanho = tamanho
+        self._gravacoes = 0
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, hashlib.sha1(repr(chave).encode()).hexdigest() + '.html')
+
+    def obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            if os.path.getmtime(caminho) + self.ttl <= time.time():
+                return None
+            with open(caminho, encoding='utf-8') as arquivo:
+                return arquivo.readline().rstrip('\n'), arquivo.read()
+        except OSError:
+            return None
+
+    def guardar(self, chave, assinatura, conteudo):
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(assinatura + '\n' + conteudo)
+        os.replace(temporario, self._caminho(chave))
+        with self._lock:
+            self._gravacoes += 1
+            if self._gravacoes < max(1, self.tamanho // 10):
+                return
+            self._gravacoes = 0
+        self.remover_excedentes()
+
+    def remover_excedentes(self):
+        agora = time.time()
+        arquivos = []
+        for entrada in os.scandir(self.diretorio):
+            try:
+                modificado = entrada.stat().st_mtime
+            except OSError:
+                continue  # apagado por outro processo
+            # Temporários com mais de um minuto sobraram de uma gravação interrompida
+            if modificado + (60 if entrada.name.endswith('.tmp') else self.ttl) <= agora:
+                self._remover(entrada.path)
+            elif entrada.name.endswith('.html'):
+                arquivos.append((modificado, entrada.path))
+        arquivos.sort()
+        for _, caminho in arquivos[:max(0, len(arquivos) - self.tamanho)]:
+            self._remover(caminho)
+
+    @staticmethod
+    def _remover(caminho):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+    def limpar(self):
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(('.html', '.tmp')):
+                os.remove(os.path.join(self.diretorio, nome))
+
+class CacheFragmentos:
+    def __init__(self, backend):
+        self.backend = backend
+        self.acertos = 0
+        self.falhas = 0
+
+    def renderizar(self, chave, dependencias, gerar):
+        assinatura = versoes_entidades.assinatura(*dependencias)
+        item = self.backend.obter(chave)
+        if item is not None and item[0] == assinatura:
+            self.acertos += 1
+            return item[1]
+        self.falhas += 1
+        conteudo = gerar()
+        # Se algo foi confirmado durante a requisição, os dados lidos podem ser anteriores à alteração
+        if g.get('alteracoes_no_inicio', versoes_entidades.alteracoes) == versoes_entidades.alteracoes:
+            self.backend.guardar(chave, assinatura, conteudo)
+        return conteudo
+
+    def metricas(self):
+        total = self.acertos + self.falhas
+        return {'backend': type(self.backend).__name__, 'acertos': self.acertos, 'falhas': self.falhas,
+                'taxa_acerto': round(self.acertos / total, 4) if total else None}
+
+def criar_backend_fragmentos(app):
+    if app.config['FRAGMENTOS_BACKEND'] == 'arquivo':
+        diretorio = app.config['FRAGMENTOS_DIRETORIO'] or os.path.join(app.instance_path, 'fragmentos')
+        return FragmentosArquivo(diretorio, app.config['FRAGMENTOS_TTL'], app.config['FRAGMENTOS_TAMANHO'])
+    return FragmentosMemoria(app.config['FRAGMENTOS_TAMANHO'], app.config['FRAGMENTOS_TTL'])
+
+cache_fragmentos = estado_da_aplicacao('cache_fragmentos')
+
+def sincronizar_versoes():
+    # Antes de qualquer leitura da requisição: o conteúdo gerado nunca é mais antigo que a assinatura
+    with db.engine.connect() as conexao:
+        versoes_entidades.sincronizar(conexao)
+    g.alteracoes_no_inicio = versoes_entidades.alteracoes
+
+def fragmento(nome, chave, *dependencias, caller):
+    """Uso: {% call fragmento('treino', treino.id, ('Treino', treino.id)) %}...{% endcall %}"""
+    return Markup(cache_fragmentos.renderizar((nome, chave), dependencias, caller))
+
+def etag_da_requisicao(dependencias):
+    usuario = (type(current_user).__name__, current_user.id)
+    return versoes_entidades.assinatura(usuario, *dependencias, ('url', request.full_path))
+
+def resposta_condicional(dependencias, gerar):
+    """Responde 304 se o ETag (versões + usuário + URL) não mudou, sem executar 'gerar'."""
+    if '_flashes' in session:
+        return gerar()
+    etag = etag_da_requisicao(dependencias)
+    if request.if_none_match.contains(etag):
+        resposta = Response(status=304)
+    else:
+        resposta = make_response(gerar())
+    resposta.set_etag(etag)
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    resposta.vary.add('Cookie')
+    return resposta
+
+def _registrar_versao(mapper, connection, target):
+    chaves = object_session(target).info.setdefault('versoes_alteradas', set())
+    if isinstance(target, (Aluno, Funcionario, Exercicio)):
+        chaves.update({(type(target).__name__, target.id), (type(target).__name__, None)})
+    elif isinstance(target, Treino):
+        chaves.update({('Treino', target.id), ('Treino', None), ('fichas', target.aluno_id),
+                       ('fichas', valor_anterior(target, 'aluno_id'))})
+    elif isinstance(target, ItemTreino):
+        treino_id = valor_anterior(target, 'treino_id')
+        treino = target.__dict__.get('treino')
+        aluno_id = treino.aluno_id if treino is not None else \
+            connection.scalar(select(Treino.aluno_id).where(Treino.id == treino_id))
+        chaves.update({('Treino', treino_id), ('Treino', target.treino_id), ('Treino', None), ('fichas', aluno_id)})
+
+for _modelo in (Aluno, Funcionario, Exercicio, Treino, ItemTreino):
+    for _evento in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_modelo, _evento, _registrar_versao)
+
+@event.listens_for(Session, 'after_flush')
+@event.listens_for(Session, 'before_commit')
+def gravar_versoes(session, *args):
+    # before_commit cobre as chaves anotadas à mão após inserções pelo Core (ver atribuir_modelo)
+    chaves = session.info.pop('versoes_alteradas', None)
+    if chaves:
+        session.info.setdefault('versoes_gravadas', {}).update(versoes_entidades.gravar(
+            session.connection(), chaves, session.info.setdefault('versoes_anteriores', {})))
+
+@event.listens_for(Session, 'after_commit')
+def aplicar_versoes(session):
+    session.info.pop('versoes_anteriores', None)
+    gravadas = session.info.pop('versoes_gravadas', None)
+    if gravadas:
+        versoes_entidades.aplicar(gravadas)
@@ -0,0 +1,19 @@
+# Uso: gunicorn -c gunicorn.conf.py wsgi:app
+# Com preload_app a aplicação (módulos, templates, configuração) é criada uma vez no mestre e
+# compartilhada por cópia na escrita; cada worker descarta o pool de conexões herdado (ver create_app).
+# Para aplicar as migrações uma única vez ao subir: MIGRAR_AO_INICIAR=1
+# TAREFAS_MODO=thread (padrão) inicia um consumidor da fila em cada worker, uma vez por processo;
+# com TAREFAS_MODO=externo os workers só gravam as tarefas; rode 'flask --app app worker' à parte
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+# Reinicia workers periodicamente para limitar o crescimento de memória
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = 500
+accesslog = '-'
@@ -0,0 +1,51 @@
+import pytest
+
+from academia import create_app
+from academia.extensoes import db
+from academia.migracoes import migrar
+from academia.modelos import Funcionario
+
+
+def criar_aplicacao(caminho, nome):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}',
+        'SENHA_METODO_HASH': 'pbkdf2:sha256:1000',
+        'TAREFAS_MODO': 'externo',
+        'TESTING': True,
+    })
+    with app.app_context():
+        migrar()
+        funcionario = Funcionario(nome=nome, cargo='Instrutor', email='prof@academia')
+        funcionario.set_senha('senha')
+        db.session.add(funcionario)
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def aplicacoes(tmp_path):
+    # Mesmo id (1) e mesma sequência de versões nos dois bancos: só o estado por aplicação os separa
+    apps = [criar_aplicacao(tmp_path / 'a.db', 'Ana Souza'), criar_aplicacao(tmp_path / 'b.db', 'Bruno Lima')]
+    yield apps
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+def test_aplicacoes_nao_compartilham_usuarios_em_cache(aplicacoes):
+    clientes = [app.test_client() for app in aplicacoes]
+    for cliente in clientes:
+        assert cliente.post('/login', data={'email': 'prof@academia', 'senha': 'senha'}).status_code == 302
+    # Duas passadas: na segunda o usuário vem do cache de cada aplicação
+    for _ in range(2):
+        for cliente, nome in zip(clientes, ('Ana', 'Bruno')):
+            resposta = cliente.get('/')
+            assert resposta.status_code == 200
+            assert nome in resposta.get_data(as_text=True)
+
+
+def test_estado_criado_por_aplicacao(aplicacoes):
+    primeira, segunda = (app.extensions['academia'] for app in aplicacoes)
+    for nome in vars(primeira):
+        assert getattr(primeira, nome) is not getattr(segunda, nome), nome
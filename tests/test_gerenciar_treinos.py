@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from academia import create_app
+from academia.extensoes import db
+from academia.migracoes import migrar
+from academia.modelos import Aluno, Exercicio, Funcionario, ItemTreino, Treino
+
+# versões compartilhadas, aluno, fichas + professor, itens + exercícios, grupos dos exercícios
+CONSULTAS_POR_PAGINA = 5
+# versões compartilhadas, aluno
+CONSULTAS_PERFIL = 2
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'academia.db'}",
+        'SENHA_METODO_HASH': 'pbkdf2:sha256:1000',
+        'TAREFAS_MODO': 'externo',
+        'TESTING': True,
+    })
+    with app.app_context():
+        migrar()
+        professor = Funcionario(nome='Professor', cargo='Instrutor', email='prof@academia')
+        professor.set_senha('senha')
+        db.session.add(professor)
+        db.session.add_all(Exercicio(nome=f'Exercício {i}') for i in range(10))
+        db.session.flush()
+        exercicios = Exercicio.query.all()
+        # Aluno 1: uma ficha com um item; aluno 2: várias fichas com vários itens; aluno 3: aquecimento
+        for numero, (fichas, itens) in enumerate([(1, 1), (6, 8), (1, 1)], start=1):
+            aluno = Aluno(nome=f'Aluno {numero}', cpf=f'{numero:011d}', data_nascimento=date(2000, 1, 1))
+            db.session.add(aluno)
+            for f in range(fichas):
+                treino = Treino(nome=f'Treino {f}', aluno=aluno, funcionario=professor)
+                treino.itens = [ItemTreino(exercicio=exercicios[i % len(exercicios)], series='3', repeticoes='10')
+                                for i in range(itens)]
+                db.session.add(treino)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def contar_consultas(app, cliente, url):
+    consultas = []
+    with app.app_context():
+        engine = db.engine
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    event.listen(engine, 'after_cursor_execute', contar)
+    try:
+        resposta = cliente.get(url)
+    finally:
+        event.remove(engine, 'after_cursor_execute', contar)
+    assert resposta.status_code == 200
+    return consultas
+
+
+def test_gerenciar_treinos_numero_fixo_de_consultas(app):
+    cliente = app.test_client()
+    cliente.post('/login', data={'email': 'prof@academia', 'senha': 'senha'})
+    # Primeira página carrega usuário e catálogo em cache; as medidas vêm depois
+    contar_consultas(app, cliente, '/aluno/3/treinos')
+
+    uma_ficha = contar_consultas(app, cliente, '/aluno/1/treinos')
+    varias_fichas = contar_consultas(app, cliente, '/aluno/2/treinos')
+
+    assert len(uma_ficha) == CONSULTAS_POR_PAGINA, '\n'.join(uma_ficha)
+    assert len(varias_fichas) == CONSULTAS_POR_PAGINA, '\n'.join(varias_fichas)
+
+
+def test_perfil_aluno_numero_fixo_de_consultas(app):
+    cliente = app.test_client()
+    cliente.post('/login', data={'email': 'prof@academia', 'senha': 'senha'})
+    contar_consultas(app, cliente, '/aluno/perfil/3')
+
+    uma_ficha = contar_consultas(app, cliente, '/aluno/perfil/1')
+    varias_fichas = contar_consultas(app, cliente, '/aluno/perfil/2')
+
+    assert len(uma_ficha) == CONSULTAS_PERFIL, '\n'.join(uma_ficha)
+    assert len(varias_fichas) == CONSULTAS_PERFIL, '\n'.join(varias_fichas)
@@ -0,0 +1,4 @@
+"""Ponto de entrada WSGI para produção, ex.: gunicorn -c gunicorn.conf.py wsgi:app"""
+from academia import create_app
+
+app = create_app()